@@ -1,32 +1,116 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from flask_cors import CORS
 from dotenv import load_dotenv
+import functools
+import importlib
+import json
+import orjson
 import os
 
 db = SQLAlchemy()
-migrate = Migrate()
+# backend/migrations, wherever the app is started from
+migrate = Migrate(directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations'))
+
+# (module path, blueprint attribute) pairs, imported only when registered
+BLUEPRINTS = [
+    ('app.routes.prediction_routes', 'prediction_bp'),
+    ('app.routes.history_routes', 'history_bp'),
+    ('app.routes.feedback_routes', 'feedback_bp'),
+    ('app.routes.scheduler_routes', 'scheduler_bp'),
+]
+
+# Apps built by create_app, keyed by config name
+_APPS = {}
+
+# Pre-serialized body shared by the 500 handlers
+_INTERNAL_ERROR_BODY = json.dumps({
+    'success': False,
+    'error': 'Internal server error',
+    'message': 'An unexpected error occurred'
+}).encode()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson (native datetime and numpy support).
+
+    The json.dumps() arguments Flask uses map to orjson options: sort_keys
+    (defaulting to the sort_keys attribute), indent=2 and the compact
+    separators. orjson always writes UTF-8, so ensure_ascii=True is rejected
+    along with any other argument it cannot honour.
+    """
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(self, obj, **kwargs):
+        default = kwargs.pop('default', self.default)
+        option = self.option
+        if kwargs.pop('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+
+        indent = kwargs.pop('indent', None)
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif indent is not None:
+            raise TypeError(f"orjson only supports indent=2, got indent={indent!r}")
+
+        separators = kwargs.pop('separators', None)
+        if separators is not None and tuple(separators) != (',', ':'):
+            raise TypeError(f"orjson output is compact, got separators={separators!r}")
+
+        if kwargs.pop('ensure_ascii', False):
+            raise TypeError("orjson always writes UTF-8, ensure_ascii must be False")
+        if kwargs:
+            raise TypeError(f"Unsupported arguments for orjson: {', '.join(sorted(kwargs))}")
+
+        return orjson.dumps(obj, default=default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def response(self, *args, **kwargs):
+        # Same argument handling as DefaultJSONProvider.response()
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        obj = args[0] if len(args) == 1 else (args or kwargs or None)
+
+        # Pretty-printed when compact is False, or left unset in debug mode
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = self.dumps_bytes(obj, indent=2 if pretty else None)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env_once(path):
+    """Parse the .env file once per process (call cache_clear() to re-read)"""
+    load_dotenv(path)
 
 
 def create_app(config_name=None):
-    """Application factory pattern"""
+    """Application factory pattern (one app instance per config per process)"""
     # Load environment variables from .env file
     env_path = os.path.join(os.path.dirname(__file__), 'config', '.env')
-    load_dotenv(env_path)
-
-
-    app = Flask(__name__)
+    _load_env_once(env_path)
 
     # Determine config
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
 
+    if config_name not in _APPS:
+        _APPS[config_name] = _build_app(config_name)
+    return _APPS[config_name]
+
+
+def _build_app(config_name):
+    """Construct and configure a new Flask app"""
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
     # Load config from config.py
     from app.config.config import config
     app.config.from_object(config[config_name])
 
-    print("DB URI in this run:", app.config["SQLALCHEMY_DATABASE_URI"])
+    app.logger.debug("DB URI in this run: %s", app.config["SQLALCHEMY_DATABASE_URI"])
 
     # Validate production config
     if config_name == 'production' and not app.config.get('SECRET_KEY'):
@@ -34,11 +118,17 @@ def create_app(config_name=None):
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
-    CORS(app)
-
-    with app.app_context():
-        db.create_all()
+    # Batch mode lets ALTER COLUMN migrations run on SQLite too
+    migrate.init_app(app, db, render_as_batch=True)
+    register_cors(app)
+
+    # Schema is managed by the migrations in backend/migrations
+    # (`flask db upgrade`) or built by app/scripts/initialize_database.py;
+    # create_all() is only run on boot when explicitly requested
+    if app.config.get('AUTO_CREATE_SCHEMA'):
+        importlib.import_module('app.models')  # registers the tables on db.metadata
+        with app.app_context():
+            db.create_all()
 
     # Register root route
     register_root_route(app)
@@ -49,13 +139,46 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
 
-    # Initialize scheduler (if enabled via config)
-    from app.services.scheduler_service import init_scheduler
-    init_scheduler(app)
+    # Initialize scheduler only when enabled, so APScheduler and the
+    # training stack are never imported otherwise
+    if app.config.get('ENABLE_SCHEDULER'):
+        from app.services.scheduler_service import init_scheduler
+        init_scheduler(app)
 
     return app
 
 
+def register_cors(app):
+    """Add CORS headers for origins listed in CORS_ORIGINS ('*' allows any)"""
+    allowed = frozenset(
+        origin.strip() for origin in app.config.get('CORS_ORIGINS', '').split(',') if origin.strip())
+    allow_any = '*' in allowed
+
+    def allow_origin(response):
+        origin = request.headers.get('Origin')
+        if allow_any:
+            response.headers['Access-Control-Allow-Origin'] = '*'
+        elif origin in allowed:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Vary'] = 'Origin'
+        return response
+
+    @app.before_request
+    def cors_preflight():
+        # Answer preflight requests without dispatching to the view
+        if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+            response = app.response_class(status=204)
+            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+            response.headers['Access-Control-Allow-Headers'] = request.headers.get(
+                'Access-Control-Request-Headers', 'Content-Type')
+            return response
+
+    # Also runs for preflight responses returned above
+    @app.after_request
+    def cors_headers(response):
+        return allow_origin(response)
+
+
 def register_root_route(app):
     """Register root route for health check"""
     @app.route('/')
@@ -76,15 +199,9 @@ def register_root_route(app):
 def register_blueprints(app):
     """Register Flask blueprints"""
     # Import blueprints here to avoid circular imports
-    from app.routes.prediction_routes import prediction_bp
-    from app.routes.history_routes import history_bp
-    from app.routes.feedback_routes import feedback_bp
-    from app.routes.scheduler_routes import scheduler_bp
-
-    app.register_blueprint(prediction_bp)
-    app.register_blueprint(history_bp)
-    app.register_blueprint(feedback_bp)
-    app.register_blueprint(scheduler_bp)
+    for module_path, attr in BLUEPRINTS:
+        module = importlib.import_module(module_path)
+        app.register_blueprint(getattr(module, attr))
 
 
 def register_error_handlers(app):
@@ -92,33 +209,31 @@ def register_error_handlers(app):
 
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
-            'success': False,
-            'error': 'Resource not found',
-            'message': str(error)
-        }), 404
+        return _error_response('Resource not found', str(error), 404)
 
     @app.errorhandler(400)
     def bad_request(error):
-        return jsonify({
-            'success': False,
-            'error': 'Bad request',
-            'message': str(error)
-        }), 400
+        return _error_response('Bad request', str(error), 400)
 
     @app.errorhandler(500)
     def internal_server_error(error):
-        return jsonify({
-            'success': False,
-            'error': 'Internal server error',
-            'message': 'An unexpected error occurred'
-        }), 500
+        return Response(_INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
 
     @app.errorhandler(Exception)
     def handle_exception(error):
         app.logger.error(f'Unhandled exception: {str(error)}')
-        return jsonify({
-            'success': False,
-            'error': 'Internal server error',
-            'message': 'An unexpected error occurred'
-        }), 500
+        return Response(_INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
+
+
+@functools.lru_cache(maxsize=128)
+def _error_body(error, message):
+    """Serialize an error payload once per distinct (error, message) pair"""
+    return json.dumps({
+        'success': False,
+        'error': error,
+        'message': message
+    }).encode()
+
+
+def _error_response(error, message, status):
+    return Response(_error_body(error, message), status=status, mimetype='application/json')
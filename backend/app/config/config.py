@@ -20,17 +20,37 @@ class Config:
     SQLALCHEMY_DATABASE_URI = database_url
 
     # Connection pool settings for PostgreSQL/Supabase
+    # Size the pool to the gunicorn workers * threads fan-out. Connections are
+    # recycled before the server-side idle timeout (~300s on Supabase), so a
+    # stale connection is never checked out and the pre-ping SELECT 1 is
+    # skipped. Setting POOL_RECYCLE above the idle timeout re-enables pre-ping.
+    POOL_SIZE = int(os.environ.get('POOL_SIZE', '10'))
+    MAX_OVERFLOW = int(os.environ.get('MAX_OVERFLOW', '20'))
+    POOL_RECYCLE = int(os.environ.get('POOL_RECYCLE', '280'))
+    DB_IDLE_TIMEOUT = int(os.environ.get('DB_IDLE_TIMEOUT', '300'))
+
     if database_url.startswith('postgresql://'):
         SQLALCHEMY_ENGINE_OPTIONS = {
-            'pool_size': 10,
-            'pool_recycle': 3600,
-            'pool_pre_ping': True,
-            'max_overflow': 20,
+            'pool_size': POOL_SIZE,
+            'pool_recycle': POOL_RECYCLE,
+            'pool_pre_ping': POOL_RECYCLE >= DB_IDLE_TIMEOUT,
+            'max_overflow': MAX_OVERFLOW,
+            # Multi-row INSERT ... VALUES for executemany inserts, and
+            # psycopg2 execute_batch() for bulk UPDATEs (e.g. batch labels)
+            'executemany_mode': 'values_plus_batch',
+            'insertmanyvalues_page_size': 1000,
             'connect_args': {
                 'connect_timeout': 10,
             }
         }
 
+    # Comma-separated list of allowed CORS origins ('*' allows any origin)
+    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
+
+    # Run db.create_all() on app startup (dev convenience, off by default)
+    AUTO_CREATE_SCHEMA = os.environ.get(
+        'AUTO_CREATE_SCHEMA', 'False').lower() == 'true'
+
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.path.join(
@@ -49,13 +69,18 @@ class Config:
         'ENABLE_SCHEDULER', 'False').lower() == 'true'
     RETRAINING_INTERVAL_HOURS = float(
         os.environ.get('RETRAINING_INTERVAL_HOURS', '24'))
+    # Skip a scheduled retrain unless at least this many labels were
+    # created/updated since the last one (the first training always runs)
+    RETRAIN_MIN_NEW_LABELS = int(
+        os.environ.get('RETRAIN_MIN_NEW_LABELS', '50'))
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
-    SQLALCHEMY_ECHO = True
+    # Statement logging is opt-in: it formats and logs every query
+    SQLALCHEMY_ECHO = os.environ.get('SQL_ECHO') == '1'
 
 
 class TestingConfig(Config):
@@ -69,9 +94,7 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     TESTING = False
-
-    # Override to require SECRET_KEY from environment in production
-    SECRET_KEY = os.environ.get('SECRET_KEY')
+    # SECRET_KEY is inherited from Config; create_app refuses to start without it
 
 
 config = {
@@ -1,3 +1,3 @@
-from .customer import Customer
+from .customer import Customer, FEATURE_COLUMNS
 from .customer_label import CustomerLabel
 from .prediction import Prediction
@@ -1,4 +1,3 @@
-from datetime import datetime
 from app import db
 
 
@@ -8,32 +7,35 @@ class Customer(db.Model):
     id = db.Column(db.Integer, unique=True, nullable=False,
                    primary_key=True)  # original ID column
 
-    amount_rub_clo_prc = db.Column(db.Float)
-    sum_tran_aut_tendency3m = db.Column(db.Float)
-    cnt_tran_aut_tendency3m = db.Column(db.Float)
-    rest_avg_cur = db.Column(db.Float)
-    cr_prod_cnt_tovr = db.Column(db.Float)
-    trans_count_atm_prc = db.Column(db.Float)
-    amount_rub_atm_prc = db.Column(db.Float)
-    age = db.Column(db.Integer)
-    cnt_tran_med_tendency3m = db.Column(db.Float)
-    sum_tran_med_tendency3m = db.Column(db.Float)
-    sum_tran_clo_tendency3m = db.Column(db.Float)
-    cnt_tran_clo_tendency3m = db.Column(db.Float)
-    cnt_tran_sup_tendency3m = db.Column(db.Float)
-    turnover_dynamic_cur_1m = db.Column(db.Float)
-    rest_dynamic_paym_3m = db.Column(db.Float)
-    sum_tran_sup_tendency3m = db.Column(db.Float)
-    sum_tran_atm_tendency3m = db.Column(db.Float)
-    sum_tran_sup_tendency1m = db.Column(db.Float)
-    sum_tran_atm_tendency1m = db.Column(db.Float)
-    cnt_tran_sup_tendency1m = db.Column(db.Float)
-    turnover_dynamic_cur_3m = db.Column(db.Float)
-    clnt_setup_tenor = db.Column(db.Integer)
-    turnover_dynamic_paym_3m = db.Column(db.Float)
-    turnover_dynamic_paym_1m = db.Column(db.Float)
-    trans_amount_tendency3m = db.Column(db.Float)
-    trans_cnt_tendency3m = db.Column(db.Float)
+    # Features are stored as single-precision REAL (4 bytes): the model is
+    # trained in float32, so double precision only widened every row.
+    # age and clnt_setup_tenor are small counts and fit in SMALLINT (2 bytes)
+    amount_rub_clo_prc = db.Column(db.Float(precision=24))
+    sum_tran_aut_tendency3m = db.Column(db.Float(precision=24))
+    cnt_tran_aut_tendency3m = db.Column(db.Float(precision=24))
+    rest_avg_cur = db.Column(db.Float(precision=24))
+    cr_prod_cnt_tovr = db.Column(db.Float(precision=24))
+    trans_count_atm_prc = db.Column(db.Float(precision=24))
+    amount_rub_atm_prc = db.Column(db.Float(precision=24))
+    age = db.Column(db.SmallInteger)
+    cnt_tran_med_tendency3m = db.Column(db.Float(precision=24))
+    sum_tran_med_tendency3m = db.Column(db.Float(precision=24))
+    sum_tran_clo_tendency3m = db.Column(db.Float(precision=24))
+    cnt_tran_clo_tendency3m = db.Column(db.Float(precision=24))
+    cnt_tran_sup_tendency3m = db.Column(db.Float(precision=24))
+    turnover_dynamic_cur_1m = db.Column(db.Float(precision=24))
+    rest_dynamic_paym_3m = db.Column(db.Float(precision=24))
+    sum_tran_sup_tendency3m = db.Column(db.Float(precision=24))
+    sum_tran_atm_tendency3m = db.Column(db.Float(precision=24))
+    sum_tran_sup_tendency1m = db.Column(db.Float(precision=24))
+    sum_tran_atm_tendency1m = db.Column(db.Float(precision=24))
+    cnt_tran_sup_tendency1m = db.Column(db.Float(precision=24))
+    turnover_dynamic_cur_3m = db.Column(db.Float(precision=24))
+    clnt_setup_tenor = db.Column(db.SmallInteger)
+    turnover_dynamic_paym_3m = db.Column(db.Float(precision=24))
+    turnover_dynamic_paym_1m = db.Column(db.Float(precision=24))
+    trans_amount_tendency3m = db.Column(db.Float(precision=24))
+    trans_cnt_tendency3m = db.Column(db.Float(precision=24))
 
     pack_102 = db.Column(db.Boolean)
     pack_103 = db.Column(db.Boolean)
@@ -42,3 +44,8 @@ class Customer(db.Model):
 
     labels = db.relationship("CustomerLabel", backref="customer", lazy=True)
     predictions = db.relationship("Prediction", backref="customer", lazy=True)
+
+
+# Model input features in training (scaler) order: every column but the id
+FEATURE_COLUMNS = tuple(
+    column.name for column in Customer.__table__.columns if column.name != 'id')
@@ -1,9 +1,14 @@
-from datetime import datetime
+from sqlalchemy import func
 from app import db
+from app.models.timestamps import TIMESTAMP
 
 
 class CustomerLabel(db.Model):
     __tablename__ = "customer_labels"
+    __table_args__ = (
+        # Serves the scheduler's incremental "updated_at >= since" exports
+        db.Index("ix_customer_labels_updated_at", "updated_at"),
+    )
 
     id = db.Column(
         db.Integer,
@@ -11,5 +16,6 @@ class CustomerLabel(db.Model):
         primary_key=True,
         nullable=False)
     target = db.Column(db.Boolean, nullable=False)  # 0/1
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Timestamps are filled in by the database, not shipped with each INSERT
+    created_at = db.Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    updated_at = db.Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,11 +1,17 @@
-from datetime import datetime
+from sqlalchemy import func
 from app import db
+from app.models.timestamps import TIMESTAMP
 
 
 class Prediction(db.Model):
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Serves ORDER BY created_at DESC, id DESC and the (created_at, id)
+        # keyset cursor in history
+        db.Index("ix_predictions_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, db.ForeignKey("customers.id"), primary_key=True, nullable=False)
     churn_probability = db.Column(db.Float, nullable=False)
     predicted_churn = db.Column(db.Boolean, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(TIMESTAMP, server_default=func.now(), nullable=False)
@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import sqlite
+from app import db
+
+# Timestamp column type for database-filled (server_default) times.
+# SQLite stores the CURRENT_TIMESTAMP default as "YYYY-MM-DD HH:MM:SS" text and
+# compares timestamps as strings, so bind parameters must use the same format
+# (SQLAlchemy's default appends microseconds, which sorts after an equal value)
+TIMESTAMP = db.DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    'sqlite')
@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
 import logging
+import msgspec
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.models import Customer, CustomerLabel
 from app import db
 
@@ -7,6 +11,49 @@ logger = logging.getLogger(__name__)
 feedback_bp = Blueprint('feedback', __name__, url_prefix='/api/feedback')
 
 
+class LabelIn(msgspec.Struct):
+    customer_id: int
+    target: bool
+
+
+class BatchLabelsIn(msgspec.Struct):
+    # Entries are validated one by one (LabelIn), so a bad entry is reported
+    # by index instead of rejecting the whole batch
+    labels: list
+
+
+def _upsert_label(customer_id, target):
+    """
+    Insert or update a customer's label. Returns True if a new row was created.
+    """
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        # xmax is 0 only for freshly inserted tuples
+        stmt = pg_insert(CustomerLabel).values(id=customer_id, target=target)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CustomerLabel.id],
+            set_={'target': target, 'updated_at': func.now()}
+        ).returning(literal_column('xmax = 0'))
+        return bool(db.session.execute(stmt).scalar())
+
+    created = db.session.get(CustomerLabel, customer_id) is None
+
+    if dialect == 'sqlite':
+        stmt = sqlite_insert(CustomerLabel).values(id=customer_id, target=target)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CustomerLabel.id],
+            set_={'target': target, 'updated_at': func.now()}
+        )
+        db.session.execute(stmt)
+    elif created:
+        db.session.add(CustomerLabel(id=customer_id, target=target))
+    else:
+        db.session.get(CustomerLabel, customer_id).target = target
+
+    return created
+
+
 @feedback_bp.route('/add-label', methods=['POST'])
 def add_label():
     try:
@@ -35,13 +82,11 @@ def add_label():
                 'error': f'Customer with id {customer_id} not found'
             }), 404
 
-        # Check if label already exists
-        existing_label = CustomerLabel.query.get(customer_id)
-        if existing_label:
-            # Update existing label
-            existing_label.target = target
-            db.session.commit()
+        # Insert or update the label in a single statement
+        created = _upsert_label(customer_id, target)
+        db.session.commit()
 
+        if not created:
             return jsonify({
                 'success': True,
                 'message': 'Label updated successfully',
@@ -49,22 +94,14 @@ def add_label():
                 'target': target,
                 'updated': True
             }), 200
-        else:
-            # Create new label
-            new_label = CustomerLabel(
-                id=customer_id,
-                target=target
-            )
-            db.session.add(new_label)
-            db.session.commit()
 
-            return jsonify({
-                'success': True,
-                'message': 'Label added successfully',
-                'customer_id': customer_id,
-                'target': target,
-                'updated': False
-            }), 201
+        return jsonify({
+            'success': True,
+            'message': 'Label added successfully',
+            'customer_id': customer_id,
+            'target': target,
+            'updated': False
+        }), 201
 
     except Exception as e:
         db.session.rollback()
@@ -79,41 +116,54 @@ def add_label():
 @feedback_bp.route('/batch-labels', methods=['POST'])
 def add_batch_labels():
     try:
-        data = request.get_json()
-        if not data:
+        body = request.get_data()
+        if not body:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
 
-        labels = data.get('labels')
-        if not labels or not isinstance(labels, list):
+        # Decode the envelope in one pass; entries are checked below
+        try:
+            payload = msgspec.json.decode(body, type=BatchLabelsIn)
+        except msgspec.ValidationError as e:
+            return jsonify({
+                'success': False,
+                'error': 'labels must be a non-empty list',
+                'message': str(e)
+            }), 400
+        except msgspec.DecodeError as e:
+            return jsonify({'success': False, 'error': 'Invalid JSON', 'message': str(e)}), 400
+
+        labels = payload.labels
+        if not labels:
             return jsonify({'success': False, 'error': 'labels must be a non-empty list'}), 400
 
         added = 0
         updated = 0
         errors = []
 
+        # Validate each entry; invalid ones are reported and skipped
+        entries = []
         for idx, label_data in enumerate(labels):
-            customer_id = label_data.get('customer_id')
-            target = label_data.get('target')
-
-            # Validate each entry
-            if customer_id is None or target is None:
-                errors.append({
-                    'index': idx,
-                    'error': 'Missing customer_id or target'
-                })
+            try:
+                label = msgspec.convert(label_data, LabelIn)
+            except msgspec.ValidationError as e:
+                error = {'index': idx, 'error': str(e)}
+                if isinstance(label_data, dict) and label_data.get('customer_id') is not None:
+                    error['customer_id'] = label_data['customer_id']
+                errors.append(error)
                 continue
-
-            if not isinstance(target, bool):
-                errors.append({
-                    'index': idx,
-                    'customer_id': customer_id,
-                    'error': 'target must be a boolean'
-                })
-                continue
-
-            # Check if customer exists
-            customer = Customer.query.get(customer_id)
-            if not customer:
+            entries.append((idx, label.customer_id, label.target))
+
+        # Load existing customers and labels for the whole batch in two queries
+        ids = {customer_id for _, customer_id, _ in entries}
+        existing_customers = set(db.session.scalars(
+            select(Customer.id).where(Customer.id.in_(ids))))
+        existing_labels = set(db.session.scalars(
+            select(CustomerLabel.id).where(CustomerLabel.id.in_(ids))))
+
+        to_insert = {}
+        to_update = {}
+        for idx, customer_id, target in entries:
+            if customer_id not in existing_customers:
                 errors.append({
                     'index': idx,
                     'customer_id': customer_id,
@@ -121,19 +171,21 @@ def add_batch_labels():
                 })
                 continue
 
-            # Check if label already exists
-            existing_label = CustomerLabel.query.get(customer_id)
-            if existing_label:
-                existing_label.target = target
+            if customer_id in to_insert:
+                # Repeated id within the batch: last value wins
+                to_insert[customer_id]['target'] = target
+                updated += 1
+            elif customer_id in existing_labels:
+                to_update[customer_id] = {'id': customer_id, 'target': target}
                 updated += 1
             else:
-                new_label = CustomerLabel(
-                    id=customer_id,
-                    target=target
-                )
-                db.session.add(new_label)
+                to_insert[customer_id] = {'id': customer_id, 'target': target}
                 added += 1
 
+        if to_insert:
+            db.session.bulk_insert_mappings(CustomerLabel, list(to_insert.values()))
+        if to_update:
+            db.session.bulk_update_mappings(CustomerLabel, list(to_update.values()))
         db.session.commit()
 
         return jsonify({
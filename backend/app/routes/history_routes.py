@@ -1,10 +1,32 @@
 from flask import Blueprint, jsonify, request
 import logging
+from datetime import datetime, timezone
+from sqlalchemy import select, tuple_
 from app.models import Prediction
+from app import db
 
 logger = logging.getLogger(__name__)
 history_bp = Blueprint('history', __name__, url_prefix='/api/history')
 
+# Columns returned by the history endpoints, in select order
+HISTORY_KEYS = ('id', 'churn_probability', 'predicted_churn', 'created_at')
+
+
+# Keyset cursor for the history listing: "<UTC timestamp>_<id>" of the last
+# row on a page. Naive UTC ISO format keeps it URL-safe (no '+' offset)
+def encode_cursor(created_at, prediction_id):
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return f"{created_at.isoformat()}_{prediction_id}"
+
+
+# Parse a cursor from encode_cursor; raises ValueError if malformed
+def decode_cursor(cursor):
+    timestamp, _, prediction_id = cursor.rpartition('_')
+    created_at = datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc)
+    return created_at, int(prediction_id)
+
+
 @history_bp.route('/recent', methods=['GET'])
 def get_recent_predictions():
     try:
@@ -12,23 +34,41 @@ def get_recent_predictions():
         limit = request.args.get('limit', default=20, type=int)
         limit = max(1, min(limit, 50))
 
-        # Query the most recent N predictions
-        predictions = Prediction.query.order_by(
-            Prediction.created_at.desc()).limit(limit).all()
+        # Read-only listing: select plain columns, no ORM instances
+        stmt = select(*(getattr(Prediction, key) for key in HISTORY_KEYS))
+
+        # Optional keyset cursor (next_before from the previous page): only
+        # return predictions after (older than) that row
+        before = request.args.get('before')
+        if before:
+            try:
+                before_ts, before_id = decode_cursor(before)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'before must be a next_before cursor from a previous page'
+                }), 400
+            key = (Prediction.created_at, Prediction.id)
+            # Bind with the column types so the timestamp is formatted like stored values
+            stmt = stmt.where(
+                tuple_(*key) < tuple_(before_ts, before_id, types=[col.type for col in key]))
+
+        # Query the most recent N predictions; id breaks created_at ties so
+        # rows sharing a timestamp are neither skipped nor repeated across pages
+        stmt = stmt.order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit)
+        rows = db.session.execute(stmt).all()
+
+        # Convert row tuples to dicts (prediction id is the customer id)
+        recent_history = [dict(zip(HISTORY_KEYS, row), customer_id=row[0]) for row in rows]
 
-        # Convert predictions to list of dicts
-        recent_history = [{
-            'id': pred.id,
-            'customer_id': pred.id,
-            'churn_probability': pred.churn_probability,
-            'predicted_churn': pred.predicted_churn,
-            'created_at': pred.created_at.isoformat() if pred.created_at else None
-        } for pred in predictions]
+        # A full page may have more behind it
+        next_before = encode_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == limit else None
 
         return jsonify({
             'success': True,
             'count': len(recent_history),
-            'predictions': recent_history
+            'predictions': recent_history,
+            'next_before': next_before
         }), 200
 
     except Exception as e:
@@ -1,9 +1,7 @@
 from flask import Blueprint, request, jsonify
-import pandas as pd
 import logging
 from sqlalchemy import func
-from app.services.model_interface import predict, retrain_model
-from app.models import Customer, Prediction
+from app.models import Customer, Prediction, FEATURE_COLUMNS
 from app import db
 
 logger = logging.getLogger(__name__)
@@ -17,54 +15,46 @@ def predict_single():
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
 
-        # Convert single record dict to DataFrame
-        input_df = pd.DataFrame([data])
+        # TensorFlow is imported on the first prediction, not at app startup
+        from app.services.model_interface import predict_one
+        from app.services.preprocesser import validate_record
 
-        # Call your model interface predict function
-        result = predict(input_df)
+        # Coerce the features up front so bad input is a client error
+        try:
+            features = validate_record(data, FEATURE_COLUMNS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': 'Invalid features', 'message': str(e)}), 400
 
-        # Extract prediction results
-        prediction_value = result['predictions'][0] if 'predictions' in result else None
-        probability_value = result['probabilities'][0] if 'probabilities' in result else None
-
-        if prediction_value is None or probability_value is None:
-            return jsonify({
-                'success': False,
-                'error': 'Invalid prediction result'
-            }), 500
+        # Single records skip DataFrame construction entirely
+        result = predict_one(features)
 
         # If customer ID not provided, auto-generate next ID
-        if 'id' not in data or data['id'] is None:
+        customer_id = data.get('id')
+        if customer_id is None:
             # Get the maximum customer ID and increment
             max_id = db.session.query(func.max(Customer.id)).scalar()
-            next_id = (max_id or 0) + 1
-            data['id'] = next_id
-            logger.info(f"Auto-generated customer ID: {next_id}")
-
-        # Create or update customer record
-        customer = Customer(**data)
-        db.session.add(customer)
-        db.session.flush()  # Get the customer ID without committing
+            customer_id = (max_id or 0) + 1
+            logger.info(f"Auto-generated customer ID: {customer_id}")
 
-        # Create prediction record
+        # Create customer and prediction records; the relationship fills in
+        # the prediction's id, so both inserts go out in one flush on commit
+        customer = Customer(id=customer_id, **features)
         prediction_record = Prediction(
-            id=customer.id,
-            churn_probability=float(probability_value),
-            predicted_churn=bool(prediction_value)
+            customer=customer,
+            churn_probability=result['probability'],
+            predicted_churn=result['prediction']
         )
-        db.session.add(prediction_record)
+        db.session.add_all([customer, prediction_record])
         db.session.commit()
 
-        # Convert to lists for JSON response
-        if 'predictions' in result:
-            result['predictions'] = result['predictions'].tolist()
-        if 'probabilities' in result:
-            result['probabilities'] = result['probabilities'].tolist()
-
         return jsonify({
             'success': True,
             'customer_id': customer.id,
-            'prediction': result
+            'prediction': {
+                'predictions': [int(result['prediction'])],
+                'probabilities': [result['probability']],
+                'input_shape': list(result['input_shape'])
+            }
         }), 200
 
     except Exception as e:
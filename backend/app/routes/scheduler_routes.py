@@ -1,7 +1,5 @@
 from flask import Blueprint, jsonify
 import logging
-from app.services.scheduler_service import get_scheduler
-from app.services.data_export import get_labeled_data_stats
 
 logger = logging.getLogger(__name__)
 scheduler_bp = Blueprint('scheduler', __name__, url_prefix='/api/scheduler')
@@ -12,13 +10,18 @@ def get_status():
     """
     Get the current status of the retraining scheduler. For debugging
     """
+    # Imported lazily: the scheduler service pulls in APScheduler and the
+    # training stack, which is not needed unless this endpoint is hit
+    from app.services.scheduler_service import get_scheduler
+    from app.services.data_export import get_cached_labeled_data_stats
+
     try:
         scheduler = get_scheduler()
         status = scheduler.get_status()
 
-        # Also include database stats
+        # Also include database stats (cached briefly, this endpoint is polled)
         try:
-            db_stats = get_labeled_data_stats()
+            db_stats = get_cached_labeled_data_stats()
             status['labeled_data_stats'] = db_stats
         except Exception as e:
             logger.warning(f"Could not fetch labeled data stats: {e}")
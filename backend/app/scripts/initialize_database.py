@@ -2,144 +2,430 @@
 Initialize database: create tables and load CSV data.
 """
 
+import argparse
+import os
+import struct
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-import psycopg2
 from psycopg2 import sql
-import io
 from sqlalchemy import text
+from flask_migrate import stamp
 from app import create_app, db
-from datetime import datetime
-from urllib.parse import urlparse
+from app.models import Customer, CustomerLabel
+
+# CSV columns coerced before loading, taken from the Customer model types
+BOOL_COLUMNS = [column.name for column in Customer.__table__.columns
+                if isinstance(column.type, db.Boolean)]
+INT_COLUMNS = [column.name for column in Customer.__table__.columns
+               if isinstance(column.type, db.Integer)]
+# Rows encoded per chunk while streaming into COPY
+COPY_CHUNK_ROWS = 50_000
+# COPY BINARY framing: signature + flags + header extension length, the
+# per-field NULL marker, and the end-of-data marker
+COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+COPY_BINARY_NULL = struct.pack('>i', -1)
+COPY_BINARY_TRAILER = struct.pack('>h', -1)
+# Rows per CSV batch / COPY statement, and how many COPYs run concurrently
+COPY_BATCH_ROWS = 200_000
+COPY_WORKERS = 4
+# Loaded as UNLOGGED (no WAL per COPY) and switched back to LOGGED afterwards
+LOAD_UNLOGGED_TABLES = ('customers', 'customer_labels')
+# Applied with SET LOCAL to every load transaction (see load_transaction)
+LOAD_SESSION_SETTINGS = (
+    "SET LOCAL synchronous_commit = off",
+    "SET LOCAL work_mem = '256MB'",
+    "SET LOCAL maintenance_work_mem = '1GB'",
+)
+# Constraints dropped for the bulk load and rebuilt once the data is in, so
+# COPY does not pay per-row index maintenance and foreign key checks
+LOAD_DEFERRED_CONSTRAINTS = [
+    ('customers', 'customers_id_key', 'UNIQUE (id)'),
+    ('customer_labels', 'customer_labels_id_fkey',
+     'FOREIGN KEY (id) REFERENCES customers (id)'),
+    ('predictions', 'predictions_id_fkey',
+     'FOREIGN KEY (id) REFERENCES customers (id)'),
+]
+
+
+class CopyStream:
+    """Read-only file-like view over an iterable of bytes for copy_expert().
+
+    Chunks are produced lazily as COPY reads, so the whole payload is never
+    held in memory at once.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = b''
+        self._pos = 0
+
+    def read(self, size=-1):
+        if self._pos >= len(self._chunk):
+            self._chunk = next(self._chunks, b'')
+            self._pos = 0
+        if size is None or size < 0:
+            size = len(self._chunk)
+        data = self._chunk[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+
+def binary_field_struct(column_type):
+    """Big-endian (length, value) struct for a column in COPY BINARY format."""
+    if isinstance(column_type, db.Boolean):
+        code = '?'
+    elif isinstance(column_type, db.SmallInteger):
+        code = 'h'
+    elif isinstance(column_type, db.Integer):
+        code = 'i'
+    elif isinstance(column_type, db.Float):
+        code = 'f' if (column_type.precision or 53) <= 24 else 'd'
+    else:
+        raise TypeError(f"No binary COPY encoding for {column_type!r}")
+    return struct.Struct('>i' + code)
+
+
+def binary_tuple_dtype(fields):
+    """Packed NumPy record matching one NULL-free COPY BINARY tuple.
+
+    Every field has a fixed width, so a whole chunk of tuples is a single
+    big-endian structured array.
+    """
+    layout = [('count', '>i2')]
+    for i, field in enumerate(fields):
+        layout += [(f'len{i}', '>i4'), (f'val{i}', '>' + field.format[-1])]
+    return np.dtype(layout)
+
+
+def _fits_fields(chunk, fields):
+    """True if every integer column fits the width of its binary field."""
+    for col, field in zip(chunk.columns, fields):
+        code = field.format[-1]
+        if code in 'hi':
+            info = np.iinfo('>' + code)
+            values = chunk[col].to_numpy()
+            if len(values) and (values.min() < info.min or values.max() > info.max):
+                return False
+    return True
+
+
+def encode_tuples(chunk, fields, tuple_dtype):
+    """Encode a DataFrame chunk as COPY BINARY tuples."""
+    # Out-of-range ints would wrap in the structured array; the row-by-row
+    # path rejects them with struct.error instead
+    if not chunk.isna().to_numpy().any() and _fits_fields(chunk, fields):
+        records = np.empty(len(chunk), dtype=tuple_dtype)
+        records['count'] = len(fields)
+        for i, (col, field) in enumerate(zip(chunk.columns, fields)):
+            records[f'len{i}'] = field.size - 4
+            records[f'val{i}'] = chunk[col].to_numpy()
+        return records.tobytes()
+
+    # NULL fields change the tuple width; fall back to packing row by row
+    tuple_header = struct.pack('>h', len(fields))
+    values = [chunk[col].tolist() for col in chunk.columns]
+
+    out = bytearray()
+    for row in zip(*values):
+        out += tuple_header
+        for field, value in zip(fields, row):
+            if value is None or value != value:  # NULL / NaN
+                out += COPY_BINARY_NULL
+            else:
+                out += field.pack(field.size - 4, value)
+    return bytes(out)
+
+
+def binary_copy_chunks(df, table, chunk_rows=COPY_CHUNK_ROWS):
+    """Encode df as a PostgreSQL COPY BINARY stream, one row chunk at a time.
+
+    Field encodings follow the model column types, so Postgres receives raw
+    values instead of parsing floats, ints and booleans back out of text.
+    """
+    fields = [binary_field_struct(table.c[col].type) for col in df.columns]
+    tuple_dtype = binary_tuple_dtype(fields)
+
+    yield COPY_BINARY_HEADER
+    for start in range(0, len(df), chunk_rows):
+        yield encode_tuples(df.iloc[start:start + chunk_rows], fields, tuple_dtype)
+    yield COPY_BINARY_TRAILER
+
+
+@contextmanager
+def load_transaction(engine):
+    """Cursor in a bulk-load transaction on a raw pooled engine connection.
+
+    synchronous_commit=off lets each batch commit without waiting for its WAL
+    flush; a crash can lose the tail of the load, which is rerun from scratch
+    anyway. The SET LOCAL values end with the transaction.
+    """
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            for setting in LOAD_SESSION_SETTINGS:
+                cursor.execute(setting)
+            yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()  # returns it to the engine pool
 
 
-def get_connection_params(app):
-    """Extract PostgreSQL connection parameters from app config."""
-    with app.app_context():
-        database_url = app.config['SQLALCHEMY_DATABASE_URI']
+def copy_statement(table, columns):
+    """COPY ... FROM STDIN (FORMAT BINARY) for the given table columns."""
+    return sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT BINARY)").format(
+        sql.Identifier(table.name),
+        sql.SQL(', ').join(map(sql.Identifier, columns)))
 
-    if not database_url or not database_url.startswith('postgresql://'):
-        raise ValueError("DATABASE_URL must be a PostgreSQL connection string")
 
-    parsed = urlparse(database_url)
-    return {
-        'host': parsed.hostname,
-        'port': parsed.port,
-        'database': parsed.path[1:],
-        'user': parsed.username,
-        'password': parsed.password
-    }
+def copy_batch(engine, batch_df, table):
+    """COPY one DataFrame batch on its own pooled connection."""
+    with load_transaction(engine) as cursor:
+        cursor.copy_expert(copy_statement(table, batch_df.columns),
+                           CopyStream(binary_copy_chunks(batch_df, table)))
 
+    return len(batch_df)
 
-def create_tables(app):
-    """Create all database tables."""
-    print("\nCreating tables...")
 
-    with app.app_context():
-        db.session.execute(text("DROP TABLE IF EXISTS predictions CASCADE"))
-        db.session.execute(
-            text("DROP TABLE IF EXISTS customer_labels CASCADE"))
-        db.session.execute(text("DROP TABLE IF EXISTS customers CASCADE"))
-        db.session.commit()
+def read_csv_batches(csv_path, batch_rows=COPY_BATCH_ROWS):
+    """Yield (customers_df, labels_df) per CSV batch, typed for COPY.
 
-        db.create_all()
+    labels_df is None when the CSV has no target column.
+    """
+    for df in pd.read_csv(csv_path, chunksize=batch_rows):
+        df.columns = df.columns.str.lower()
 
-    print("Tables created successfully")
+        customer_cols = [col for col in df.columns if col != 'target']
+        customers_df = df[customer_cols].copy()
 
+        if 'id' not in customers_df.columns:
+            raise ValueError("CSV must have an 'id' column")
 
-def load_csv_data(app, csv_path='churn.csv'):
-    """Load data from CSV using PostgreSQL COPY."""
-    print(f"\nLoading data from {csv_path}...")
+        # Ensure id is first column
+        id_col = customers_df.pop('id')
+        customers_df.insert(0, 'id', id_col)
 
-    df = pd.read_csv(csv_path)
-    df.columns = df.columns.str.lower()
+        # Type conversions (one vectorized pass per dtype group)
+        bool_cols = [col for col in BOOL_COLUMNS if col in customers_df.columns]
+        int_cols = [col for col in INT_COLUMNS if col in customers_df.columns]
+        customers_df[int_cols] = customers_df[int_cols].fillna(0).round()
+        customers_df = customers_df.astype(
+            {**dict.fromkeys(bool_cols, bool), **dict.fromkeys(int_cols, int)})
 
-    has_target = 'target' in df.columns
-    customer_cols = [col for col in df.columns if col != 'target']
-    customers_df = df[customer_cols].copy()
+        labels_df = None
+        if 'target' in df.columns:
+            # created_at/updated_at are filled in by their server defaults
+            labels_df = pd.DataFrame({
+                'id': df['id'].astype(int),
+                'target': df['target'].astype(bool)
+            })
+
+        yield customers_df, labels_df
+
+
+def run_statement(engine, statement):
+    """Execute and commit a single statement on a pooled connection."""
+    with load_transaction(engine) as cursor:
+        cursor.execute(statement)
+
+
+def drop_load_constraints(engine):
+    """Drop LOAD_DEFERRED_CONSTRAINTS, foreign keys first."""
+    for table, name, _ in reversed(LOAD_DEFERRED_CONSTRAINTS):
+        run_statement(engine, sql.SQL(
+            "ALTER TABLE {} DROP CONSTRAINT IF EXISTS {}").format(
+                sql.Identifier(table), sql.Identifier(name)))
 
-    if 'id' not in customers_df.columns:
-        raise ValueError("CSV must have an 'id' column")
 
-    # Ensure id is first column
-    id_col = customers_df.pop('id')
-    customers_df.insert(0, 'id', id_col)
-    customer_cols = customers_df.columns.tolist()
+def set_tables_logged(engine, executor, logged):
+    """Switch LOAD_UNLOGGED_TABLES between LOGGED and UNLOGGED in parallel.
 
-    # Type conversions
-    bool_cols = ['pack_102', 'pack_103', 'pack_104', 'pack_105']
-    for col in bool_cols:
-        if col in customers_df.columns:
-            customers_df[col] = customers_df[col].astype(bool)
+    Going back to LOGGED rewrites each table once, which writes far less WAL
+    than logging every COPY batch.
+    """
+    mode = sql.SQL('LOGGED' if logged else 'UNLOGGED')
+    futures = [
+        executor.submit(run_statement, engine, sql.SQL(
+            "ALTER TABLE {} SET {}").format(sql.Identifier(table), mode))
+        for table in LOAD_UNLOGGED_TABLES
+    ]
+    for future in futures:
+        future.result()
 
-    int_cols = ['id', 'age', 'clnt_setup_tenor']
-    for col in int_cols:
-        if col in customers_df.columns:
-            customers_df[col] = customers_df[col].fillna(0).round().astype(int)
 
-    conn_params = get_connection_params(app)
-    conn = psycopg2.connect(**conn_params)
-    cursor = conn.cursor()
+def restore_load_constraints(engine, executor, constraints=LOAD_DEFERRED_CONSTRAINTS):
+    """Recreate LOAD_DEFERRED_CONSTRAINTS (or the given subset) in parallel."""
+    futures = [
+        executor.submit(run_statement, engine, sql.SQL(
+            "ALTER TABLE {} ADD CONSTRAINT {} " + definition).format(
+                sql.Identifier(table), sql.Identifier(name)))
+        for table, name, definition in constraints
+    ]
+    for future in futures:
+        future.result()
 
+
+def missing_load_constraints(engine):
+    """The LOAD_DEFERRED_CONSTRAINTS that are currently dropped."""
+    with load_transaction(engine) as cursor:
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conname = ANY(%s)",
+                       ([name for _, name, _ in LOAD_DEFERRED_CONSTRAINTS],))
+        present = {name for name, in cursor.fetchall()}
+    return [constraint for constraint in LOAD_DEFERRED_CONSTRAINTS
+            if constraint[1] not in present]
+
+
+def undo_load_setup(engine, executor):
+    """Switch the tables back to LOGGED and recreate any dropped constraints
+    after a failed load.
+
+    Best effort, so the load error stays the one reported: a step that fails
+    (e.g. UNIQUE (id) over duplicate rows of a partial load) is printed.
+    """
     try:
-        # Load customers
-        print(f"Loading {len(customers_df):,} customers...")
+        set_tables_logged(engine, executor, logged=True)
+        restore_load_constraints(engine, executor, missing_load_constraints(engine))
+    except Exception as e:
+        print(f"Could not restore the tables after the failed load: {e}")
 
-        columns_sql = sql.SQL(', ').join(map(sql.Identifier, customer_cols))
-        copy_sql = sql.SQL(
-            "COPY customers ({}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')").format(columns_sql)
 
-        buffer = io.StringIO()
-        customers_df.to_csv(buffer, index=False, header=False, na_rep='\\N')
-        buffer.seek(0)
+def create_tables(app):
+    """Create all database tables."""
+    print("\nCreating tables...")
 
-        cursor.copy_expert(copy_sql, buffer)
-        conn.commit()
-        print("Customers loaded")
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(text("DROP TABLE IF EXISTS predictions CASCADE"))
+            db.session.execute(
+                text("DROP TABLE IF EXISTS customer_labels CASCADE"))
+            db.session.execute(text("DROP TABLE IF EXISTS customers CASCADE"))
+            db.session.commit()
+        else:
+            db.drop_all()
 
-        # Load labels if present
-        if has_target:
-            print(f"Loading {len(df):,} labels...")
+        db.create_all()
+        # The tables match the models, so mark the migrations as applied
+        stamp()
 
-            labels_df = pd.DataFrame({
-                'id': df['id'].astype(int),
-                'target': df['target'].astype(bool),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            })
+    print("Tables created successfully")
+
+
+def insert_csv_data(engine, csv_path):
+    """Fallback loader for databases without COPY (e.g. the SQLite dev DB).
+
+    Each CSV batch goes in as one executemany INSERT per table rather than a
+    statement per row.
+    """
+    loaded = {Customer.__tablename__: 0, CustomerLabel.__tablename__: 0}
 
-            buffer = io.StringIO()
-            labels_df.to_csv(buffer, index=False, header=False)
-            buffer.seek(0)
+    for customers_df, labels_df in read_csv_batches(csv_path):
+        with engine.begin() as conn:
+            conn.execute(Customer.__table__.insert(),
+                         customers_df.to_dict('records'))
+            loaded[Customer.__tablename__] += len(customers_df)
 
-            cursor.copy_expert(
-                """
-                COPY customer_labels (id, target, created_at, updated_at)
-                FROM STDIN WITH (FORMAT CSV)
-                """,
-                buffer
-            )
-            conn.commit()
-            print("Labels loaded")
+            if labels_df is not None:
+                conn.execute(CustomerLabel.__table__.insert(),
+                             labels_df.to_dict('records'))
+                loaded[CustomerLabel.__tablename__] += len(labels_df)
+
+    print(f"Loaded {loaded[Customer.__tablename__]:,} customers and "
+          f"{loaded[CustomerLabel.__tablename__]:,} labels")
+    print("\nData loading complete")
+
+
+def load_csv_data(app, csv_path='churn.csv', workers=COPY_WORKERS):
+    """Load data from CSV using parallel binary PostgreSQL COPY batches."""
+    print(f"\nLoading data from {csv_path}...")
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        return insert_csv_data(engine, csv_path)
+
+    # psycopg2 releases the GIL inside libpq, so threads are enough to keep
+    # several COPY streams in flight against a remote database
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    loaded = {Customer.__tablename__: 0, CustomerLabel.__tablename__: 0}
+
+    try:
+        # Foreign keys are dropped, so customers and labels of the same batch
+        # can be copied side by side
+        drop_load_constraints(engine)
+        # Only possible once no permanent table references them
+        set_tables_logged(engine, executor, logged=False)
+
+        # The CSV is read one batch at a time; waiting on the oldest COPY
+        # once enough are queued keeps memory bounded by a few batches
+        for customers_df, labels_df in read_csv_batches(csv_path):
+            batches = [(Customer.__table__, customers_df)]
+            if labels_df is not None:
+                batches.append((CustomerLabel.__table__, labels_df))
+
+            for table, batch_df in batches:
+                pending.append((table.name, executor.submit(
+                    copy_batch, engine, batch_df, table)))
+
+            while len(pending) > 2 * workers:
+                name, future = pending.popleft()
+                loaded[name] += future.result()
+
+        while pending:
+            name, future = pending.popleft()
+            loaded[name] += future.result()
+
+        print(f"Loaded {loaded[Customer.__tablename__]:,} customers and "
+              f"{loaded[CustomerLabel.__tablename__]:,} labels")
+
+        print("Rebuilding constraints...")
+        set_tables_logged(engine, executor, logged=True)
+        restore_load_constraints(engine, executor)
 
         print("\nData loading complete")
 
+    except BaseException:
+        # Queued COPYs are cancelled and running ones finish before the
+        # tables are switched back
+        for _, future in pending:
+            future.cancel()
+        wait([future for _, future in pending])
+        undo_load_setup(engine, executor)
+        raise
+
     finally:
-        cursor.close()
-        conn.close()
+        executor.shutdown(wait=True)
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('csv_path', nargs='?', default='churn.csv',
+                        help="CSV file to load (default: churn.csv)")
+    parser.add_argument('--yes', action='store_true',
+                        help="Skip the confirmation prompt (also PGW_CONFIRM=1)")
+    return parser.parse_args(argv)
 
 
 def main():
     """Main execution."""
-    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'churn.csv'
+    args = parse_args()
+    csv_path = args.csv_path
 
     print("=" * 50)
     print("DATABASE INITIALIZATION")
     print("=" * 50)
     print(f"CSV: {csv_path}")
     print("\nThis will DROP existing tables and load new data")
-    print("Press Enter to continue or Ctrl+C to cancel...")
-    input()
+    if not (args.yes or os.environ.get('PGW_CONFIRM') == '1'):
+        print("Press Enter to continue or Ctrl+C to cancel...")
+        input()
 
     app = create_app()
 
@@ -1,17 +1,23 @@
-import sys
-import os
-from datetime import datetime
-import pandas as pd
+"""
+Train the initial model from labeled customers in the database.
 
-# Add parent directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+Run from backend/: python -m app.scripts.train_from_db
+"""
 
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
 from app import create_app, db
-from app.models.customer import Customer
+from app.models.customer import Customer, FEATURE_COLUMNS
 from app.models.customer_label import CustomerLabel
-from app.services.model_interface import retrain_model, MODEL_PATH, SCALER_PATH, ML_MODELS_DIR
+from app.services.model_interface import retrain_model, ML_MODELS_DIR
 from app.services.model_versioning import ModelVersionManager
 
+BOOL_FEATURES = [col for col in FEATURE_COLUMNS
+                 if isinstance(Customer.__table__.c[col].type, db.Boolean)]
+
 
 def fetch_labeled_customers():
     """
@@ -19,71 +25,36 @@ def fetch_labeled_customers():
     """
     print("Fetching labeled customers from database...")
 
-    # Query customers with labels using a join
-    query = db.session.query(Customer, CustomerLabel).join(
-        CustomerLabel,
-        Customer.id == CustomerLabel.id
-    )
+    # Select the feature columns and target straight into a DataFrame;
+    # no ORM objects or per-row dicts
+    stmt = select(
+        *(getattr(Customer, col) for col in FEATURE_COLUMNS),
+        CustomerLabel.target.label('TARGET')
+    ).join(CustomerLabel, Customer.id == CustomerLabel.id)
 
-    results = query.all()
+    df = pd.read_sql_query(stmt, db.session.connection())
 
-    if not results:
+    if df.empty:
         raise ValueError("No labeled customers found in database")
 
-    print(f"Found {len(results)} labeled customers")
-
-    # Convert to list of dictionaries
-    data = []
-    for customer, label in results:
-        # Get all customer features
-        customer_data = {
-            'amount_rub_clo_prc': customer.amount_rub_clo_prc,
-            'sum_tran_aut_tendency3m': customer.sum_tran_aut_tendency3m,
-            'cnt_tran_aut_tendency3m': customer.cnt_tran_aut_tendency3m,
-            'rest_avg_cur': customer.rest_avg_cur,
-            'cr_prod_cnt_tovr': customer.cr_prod_cnt_tovr,
-            'trans_count_atm_prc': customer.trans_count_atm_prc,
-            'amount_rub_atm_prc': customer.amount_rub_atm_prc,
-            'age': customer.age,
-            'cnt_tran_med_tendency3m': customer.cnt_tran_med_tendency3m,
-            'sum_tran_med_tendency3m': customer.sum_tran_med_tendency3m,
-            'sum_tran_clo_tendency3m': customer.sum_tran_clo_tendency3m,
-            'cnt_tran_clo_tendency3m': customer.cnt_tran_clo_tendency3m,
-            'cnt_tran_sup_tendency3m': customer.cnt_tran_sup_tendency3m,
-            'turnover_dynamic_cur_1m': customer.turnover_dynamic_cur_1m,
-            'rest_dynamic_paym_3m': customer.rest_dynamic_paym_3m,
-            'sum_tran_sup_tendency3m': customer.sum_tran_sup_tendency3m,
-            'sum_tran_atm_tendency3m': customer.sum_tran_atm_tendency3m,
-            'sum_tran_sup_tendency1m': customer.sum_tran_sup_tendency1m,
-            'sum_tran_atm_tendency1m': customer.sum_tran_atm_tendency1m,
-            'cnt_tran_sup_tendency1m': customer.cnt_tran_sup_tendency1m,
-            'turnover_dynamic_cur_3m': customer.turnover_dynamic_cur_3m,
-            'clnt_setup_tenor': customer.clnt_setup_tenor,
-            'turnover_dynamic_paym_3m': customer.turnover_dynamic_paym_3m,
-            'turnover_dynamic_paym_1m': customer.turnover_dynamic_paym_1m,
-            'trans_amount_tendency3m': customer.trans_amount_tendency3m,
-            'trans_cnt_tendency3m': customer.trans_cnt_tendency3m,
-            # Boolean features (convert to int)
-            'pack_102': int(customer.pack_102) if customer.pack_102 is not None else 0,
-            'pack_103': int(customer.pack_103) if customer.pack_103 is not None else 0,
-            'pack_104': int(customer.pack_104) if customer.pack_104 is not None else 0,
-            'pack_105': int(customer.pack_105) if customer.pack_105 is not None else 0,
-            # Add target
-            'TARGET': int(label.target)
-        }
-        data.append(customer_data)
-
-    # Create DataFrame
-    df = pd.DataFrame(data)
+    print(f"Found {len(df)} labeled customers")
+
+    # Features are stored as REAL, so float32 loses nothing; boolean
+    # features and target as 0/1
+    float_cols = df.select_dtypes('float64').columns
+    df[float_cols] = df[float_cols].astype('float32')
+    df[BOOL_FEATURES] = df[BOOL_FEATURES].fillna(0).astype('int8')
+    df['TARGET'] = df['TARGET'].astype('int8')
 
     return df
 
 
-def save_training_data(df, output_path='training_data_from_db.csv'):
+def save_training_data(df, output_path='training_data_from_db.parquet'):
     """
-    Save the fetched data to CSV for development
+    Save the fetched data to Parquet for development
     """
-    df.to_csv(output_path, index=False)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), output_path,
+                   compression='zstd', row_group_size=100_000)
     print(f"\nTraining data saved to: {output_path}")
 
 
@@ -100,27 +71,19 @@ def train_initial_model_from_db(save_csv=True):
             # Fetch labeled customers
             df = fetch_labeled_customers()
 
-            # Save to CSV if requested
+            # Keep a copy of the training data if requested (archival only)
             if save_csv:
-                csv_path = os.path.join(
+                data_path = os.path.join(
                     os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                    'training_data_from_db.csv'
+                    'training_data_from_db.parquet'
                 )
-                save_training_data(df, csv_path)
-                temp_data_path = csv_path
-            else:
-                # Save to temporary file
-                import tempfile
-                temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv')
-                df.to_csv(temp_file.name, index=False)
-                temp_data_path = temp_file.name
-                temp_file.close()
+                save_training_data(df, data_path)
 
             print("Starting model training")
 
-            # Train the model
+            # Train the model on the in-memory DataFrame
             results = retrain_model(
-                new_data_path=temp_data_path,
+                new_data=df,
                 target_column='TARGET',
                 load_existing=False,  # Train from scratch
                 validation_split=0.2,
@@ -130,10 +93,6 @@ def train_initial_model_from_db(save_csv=True):
                 verbose=1
             )
 
-            # Clean up temp file if not saving CSV
-            if not save_csv and os.path.exists(temp_data_path):
-                os.remove(temp_data_path)
-
             # Save version metadata for scheduler
             try:
                 version_manager = ModelVersionManager(ML_MODELS_DIR, max_versions=3)
@@ -171,6 +130,10 @@ def train_initial_model_from_db(save_csv=True):
             raise
 
 
-if __name__ == "__main__":
-    # Train the model
+def main():
+    """Main execution."""
     train_initial_model_from_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,131 +1,81 @@
 """
-Service for exporting labeled customer data from database to CSV for model retraining.
+Service for loading labeled customer data from the database for model retraining.
 """
 
 import pandas as pd
 import logging
+import threading
+import time
 from datetime import datetime
 from typing import Optional
-from app.models import Customer, CustomerLabel
+from app.models import Customer, CustomerLabel, FEATURE_COLUMNS
 from app import db
 
 logger = logging.getLogger(__name__)
 
+# Labeled data stats are cached briefly for the polled scheduler status endpoint
+STATS_CACHE_TTL = 30  # seconds
+_stats_cache = {'value': None, 'expires': 0.0}
+_stats_lock = threading.Lock()
 
-def export_labeled_data_to_csv(
-    output_path: str,
+BOOL_FEATURES = [col for col in FEATURE_COLUMNS
+                 if isinstance(Customer.__table__.c[col].type, db.Boolean)]
+
+
+def _labeled_data_query(since: Optional[datetime] = None, include_all: bool = False):
+    """Core select of id, features and TARGET for labeled customers."""
+    stmt = db.select(
+        Customer.id,
+        *(getattr(Customer, col) for col in FEATURE_COLUMNS),
+        CustomerLabel.target.label('TARGET')
+    ).join(CustomerLabel, Customer.id == CustomerLabel.id)
+
+    # Apply time filter if specified and not include_all. updated_at starts
+    # at created_at and only moves forward, so it alone covers new and
+    # relabeled rows, and the bare comparison can use its index
+    if since is not None and not include_all:
+        stmt = stmt.where(CustomerLabel.updated_at >= since)
+
+    return stmt
+
+
+def count_labeled_data(since: Optional[datetime] = None, include_all: bool = False) -> int:
+    """
+    Count the labeled customers load_labeled_data() would return, without loading them.
+    """
+    query = _labeled_data_query(since, include_all).subquery()
+    return db.session.execute(db.select(db.func.count()).select_from(query)).scalar()
+
+
+def load_labeled_data(
     since: Optional[datetime] = None,
-    include_all: bool = False
-) -> dict:
+    include_all: bool = False,
+    sample_size: Optional[int] = None
+) -> pd.DataFrame:
     """
-    Export labeled customer data from database to CSV file for model retraining.
+    Load labeled customer data from database into a DataFrame for retraining.
 
     Args:
-        output_path (str): Path where CSV file will be saved
         since (datetime, optional): Only include labels created/updated after this time
         include_all (bool): If True, include all labeled data regardless of 'since' parameter
+        sample_size (int, optional): Return at most this many randomly chosen rows
 
     Returns:
-        dict: Statistics about the export
-
-    Raises:
-        ValueError: If no labeled data is found
+        pd.DataFrame: id, feature columns and TARGET (0/1)
     """
-    try:
-        # Build query to get customers with labels
-        query = db.session.query(Customer, CustomerLabel).join(
-            CustomerLabel,
-            Customer.id == CustomerLabel.id
-        )
-
-        # Apply time filter if specified and not include_all
-        if since is not None and not include_all:
-            query = query.filter(
-                db.or_(
-                    CustomerLabel.created_at >= since,
-                    CustomerLabel.updated_at >= since
-                )
-            )
-
-        # Execute query
-        results = query.all()
-
-        if not results:
-            # Return empty stats if no data found (especially for incremental queries)
-            if not include_all:
-                # For incremental queries, this is normal - no new data
-                return {
-                    'total_records': 0,
-                    'churned': 0,
-                    'not_churned': 0,
-                    'output_path': output_path
-                }
-            else:
-                # For full data queries, this is an error
-                raise ValueError("No labeled customer data found in database")
-
-        # Convert to list of dictionaries
-        data_rows = []
-        for customer, label in results:
-            row = {
-                'id': customer.id,
-                'amount_rub_clo_prc': customer.amount_rub_clo_prc,
-                'sum_tran_aut_tendency3m': customer.sum_tran_aut_tendency3m,
-                'cnt_tran_aut_tendency3m': customer.cnt_tran_aut_tendency3m,
-                'rest_avg_cur': customer.rest_avg_cur,
-                'cr_prod_cnt_tovr': customer.cr_prod_cnt_tovr,
-                'trans_count_atm_prc': customer.trans_count_atm_prc,
-                'amount_rub_atm_prc': customer.amount_rub_atm_prc,
-                'age': customer.age,
-                'cnt_tran_med_tendency3m': customer.cnt_tran_med_tendency3m,
-                'sum_tran_med_tendency3m': customer.sum_tran_med_tendency3m,
-                'sum_tran_clo_tendency3m': customer.sum_tran_clo_tendency3m,
-                'cnt_tran_clo_tendency3m': customer.cnt_tran_clo_tendency3m,
-                'cnt_tran_sup_tendency3m': customer.cnt_tran_sup_tendency3m,
-                'turnover_dynamic_cur_1m': customer.turnover_dynamic_cur_1m,
-                'rest_dynamic_paym_3m': customer.rest_dynamic_paym_3m,
-                'sum_tran_sup_tendency3m': customer.sum_tran_sup_tendency3m,
-                'sum_tran_atm_tendency3m': customer.sum_tran_atm_tendency3m,
-                'sum_tran_sup_tendency1m': customer.sum_tran_sup_tendency1m,
-                'sum_tran_atm_tendency1m': customer.sum_tran_atm_tendency1m,
-                'cnt_tran_sup_tendency1m': customer.cnt_tran_sup_tendency1m,
-                'turnover_dynamic_cur_3m': customer.turnover_dynamic_cur_3m,
-                'clnt_setup_tenor': customer.clnt_setup_tenor,
-                'turnover_dynamic_paym_3m': customer.turnover_dynamic_paym_3m,
-                'turnover_dynamic_paym_1m': customer.turnover_dynamic_paym_1m,
-                'trans_amount_tendency3m': customer.trans_amount_tendency3m,
-                'trans_cnt_tendency3m': customer.trans_cnt_tendency3m,
-                'pack_102': customer.pack_102,
-                'pack_103': customer.pack_103,
-                'pack_104': customer.pack_104,
-                'pack_105': customer.pack_105,
-                'TARGET': int(label.target),  # Convert boolean to 0/1
-            }
-            data_rows.append(row)
-
-        # Create DataFrame and save to CSV
-        df = pd.DataFrame(data_rows)
-        df.to_csv(output_path, index=False)
-
-        # Calculate statistics
-        stats = {
-            'total_records': len(data_rows),
-            'churned': int(df['TARGET'].sum()),
-            'not_churned': len(data_rows) - int(df['TARGET'].sum()),
-            'output_path': output_path,
-            'export_time': datetime.now().isoformat(),
-            'filtered': since is not None and not include_all,
-            'filter_since': since.isoformat() if since else None
-        }
+    stmt = _labeled_data_query(since, include_all)
+    if sample_size is not None:
+        stmt = stmt.order_by(db.func.random()).limit(sample_size)
 
-        logger.info(f"Successfully exported {stats['total_records']} labeled records to {output_path}")
-        logger.info(f"Churned: {stats['churned']}, Not churned: {stats['not_churned']}")
+    df = pd.read_sql_query(stmt, db.session.connection())
 
-        return stats
-
-    except Exception as e:
-        logger.error(f"Error exporting labeled data: {str(e)}", exc_info=True)
-        raise
+    # The features are stored as REAL, so float32 is lossless and halves the
+    # frame; booleans and the target become 0/1 int8
+    float_cols = df.select_dtypes('float64').columns
+    df[float_cols] = df[float_cols].astype('float32')
+    df[BOOL_FEATURES] = df[BOOL_FEATURES].fillna(0).astype('int8')
+    df['TARGET'] = df['TARGET'].astype('int8')
+    return df
 
 
 def get_labeled_data_stats() -> dict:
@@ -136,7 +86,16 @@ def get_labeled_data_stats() -> dict:
         dict: Statistics including total count, churn distribution, and timestamps
     """
     try:
-        total_labels = CustomerLabel.query.count()
+        # All four aggregates in one scan / round-trip
+        total_labels, churned_count, oldest_label, newest_label = db.session.execute(
+            db.select(
+                db.func.count(),
+                db.func.count().filter(CustomerLabel.target),
+                db.func.min(CustomerLabel.created_at),
+                db.func.max(db.func.coalesce(
+                    CustomerLabel.updated_at, CustomerLabel.created_at))
+            ).select_from(CustomerLabel)
+        ).one()
 
         if total_labels == 0:
             return {
@@ -147,14 +106,8 @@ def get_labeled_data_stats() -> dict:
                 'newest_label': None
             }
 
-        churned_count = CustomerLabel.query.filter_by(target=True).count()
         not_churned_count = total_labels - churned_count
 
-        oldest_label = db.session.query(db.func.min(CustomerLabel.created_at)).scalar()
-        newest_label = db.session.query(db.func.max(
-            db.func.coalesce(CustomerLabel.updated_at, CustomerLabel.created_at)
-        )).scalar()
-
         return {
             'total_labels': total_labels,
             'churned': churned_count,
@@ -166,3 +119,24 @@ def get_labeled_data_stats() -> dict:
     except Exception as e:
         logger.error(f"Error getting labeled data stats: {str(e)}", exc_info=True)
         raise
+
+
+def get_cached_labeled_data_stats(ttl: float = STATS_CACHE_TTL) -> dict:
+    """
+    Get labeled data statistics, reusing the last result for up to `ttl` seconds.
+
+    Concurrent callers on an expired cache wait on one refresh instead of each
+    querying the database.
+
+    Args:
+        ttl (float): Seconds a computed result stays valid
+
+    Returns:
+        dict: Same as get_labeled_data_stats()
+    """
+    with _stats_lock:
+        now = time.monotonic()
+        if _stats_cache['value'] is None or now >= _stats_cache['expires']:
+            _stats_cache['value'] = get_labeled_data_stats()
+            _stats_cache['expires'] = now + ttl
+        return _stats_cache['value']
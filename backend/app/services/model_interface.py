@@ -1,17 +1,35 @@
 import numpy as np
 import pandas as pd
 import os
+import hashlib
+import time
+import joblib
 
 # Configure TensorFlow before importing it
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TensorFlow warnings
 os.environ['CUDA_VISIBLE_DEVICES'] = '-1'  # Force CPU usage, disable GPU
+os.environ.setdefault('TF_ENABLE_ONEDNN_OPTS', '1')  # oneDNN (AVX2/AVX-512) CPU kernels
 
 import tensorflow as tf
 from tensorflow import keras
-from tensorflow.keras import layers, callbacks
+from tensorflow.keras import layers
 from tensorflow.keras.losses import BinaryFocalCrossentropy
-from sklearn.utils.class_weight import compute_class_weight
-from app.services.preprocesser import preprocess_and_fit, preprocess_with_scalers
+from sqlalchemy import Float
+from app.services.preprocesser import (
+    preprocess_and_fit, preprocess_with_scalers, scale_array, load_scalers, validate_record
+)
+from app.models import Customer, FEATURE_COLUMNS
+
+# CPU thread pools. Intra-op threads split each matmul (0 = one per core);
+# a sequential MLP has little op-level concurrency, so two inter-op threads
+# are enough. Both must be set before TensorFlow runs its first op
+try:
+    tf.config.threading.set_intra_op_parallelism_threads(
+        int(os.environ.get('TF_INTRA_OP_THREADS', '0')))
+    tf.config.threading.set_inter_op_parallelism_threads(
+        int(os.environ.get('TF_INTER_OP_THREADS', '2')))
+except RuntimeError:
+    pass  # TensorFlow was already initialized by the importer
 
 # Reproducibility
 np.random.seed(42)
@@ -22,6 +40,29 @@ ML_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml_mod
 MODEL_PATH = os.path.join(ML_MODELS_DIR, 'model.keras')
 SCALER_PATH = os.path.join(ML_MODELS_DIR, 'scaler.pkl')
 
+# Column dtypes for training CSVs (the labeled data export layout): REAL
+# features as float32 and the 0/1 target as int8, so nothing is inferred
+TRAINING_CSV_DTYPES = {
+    **{col: 'float32' for col in FEATURE_COLUMNS
+       if isinstance(Customer.__table__.c[col].type, Float)},
+    'TARGET': 'int8'
+}
+
+# Focal loss handles class imbalance; stateless, so one instance is shared
+FOCAL_LOSS = BinaryFocalCrossentropy(gamma=2, from_logits=False, alpha=0.25)
+
+# Training steps run per compiled call before returning to Python for
+# callbacks and metric updates
+STEPS_PER_EXECUTION = 32
+
+# Loaded models by path, as (mtime, model, infer_fn, sha256); reloaded when the file changes
+_MODEL_CACHE = {}
+# Last matching (infer_fn, scalers) by (model_path, scaler_path), see _load_model_and_scalers
+_PAIR_CACHE = {}
+# How long a reader with no matching pair yet waits for a retrain to finish swapping files
+PAIR_LOAD_ATTEMPTS = 20
+PAIR_LOAD_RETRY_DELAY = 0.05  # seconds
+
 
 # Build neural network with optimized hyperparameters from Phase 3
 def build_model(input_dim, learning_rate=0.0005, dropout_rate=0.4, l2_reg=0.001, hidden_size=256):
@@ -33,17 +74,120 @@ def build_model(input_dim, learning_rate=0.0005, dropout_rate=0.4, l2_reg=0.001,
         layers.Dense(1, activation='sigmoid')
     ])
 
-    # Focal loss handles class imbalance
-    loss_fn = BinaryFocalCrossentropy(gamma=2, from_logits=False, alpha=0.25)
+    compile_model(model, learning_rate)
+    return model
+
 
+# Compile (or recompile, resetting the optimizer) for training
+def compile_model(model, learning_rate=0.0005):
     model.compile(
         optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
-        loss=loss_fn,
+        loss=FOCAL_LOSS,
         metrics=['accuracy', keras.metrics.Precision(name='precision'),
-                 keras.metrics.Recall(name='recall'), keras.metrics.AUC(name='auc')]
+                 keras.metrics.Recall(name='recall'), keras.metrics.AUC(name='auc')],
+        steps_per_execution=STEPS_PER_EXECUTION
     )
 
-    return model
+
+# Inference copy of a Dense/BatchNormalization/Dropout stack: dropout is
+# dropped and each BatchNormalization (an affine map at inference) is folded
+# into the weights of the Dense layer after it. Any other stack is returned as is
+def _fold_batch_norm(model):
+    stack = [layer for layer in model.layers if not isinstance(layer, layers.Dropout)]
+    if not all(isinstance(layer, (layers.Dense, layers.BatchNormalization)) for layer in stack):
+        return model
+
+    fused = keras.Sequential([layers.Input(shape=(model.input_shape[1],))])
+    scale, shift = None, None
+    for layer in stack:
+        weights = layer.get_weights()
+        if isinstance(layer, layers.BatchNormalization):
+            if len(weights) != 4:
+                return model
+            gamma, beta, mean, var = weights
+            bn_scale = gamma / np.sqrt(var + layer.epsilon)
+            bn_shift = beta - mean * bn_scale
+            if scale is None:
+                scale, shift = bn_scale, bn_shift
+            else:
+                scale, shift = scale * bn_scale, shift * bn_scale + bn_shift
+            continue
+
+        if len(weights) != 2:
+            return model
+        kernel, bias = weights
+        if scale is not None:
+            # W·(scale*h + shift) + b == (scale[:, None]*W)·h + (shift·W + b)
+            bias = bias + shift @ kernel
+            kernel = scale[:, None] * kernel
+            scale, shift = None, None
+        fused.add(layers.Dense(layer.units, activation=layer.activation))
+        fused.layers[-1].set_weights([kernel, bias])
+
+    # A trailing BatchNormalization has no Dense layer to fold into
+    return model if scale is not None else fused
+
+
+# SHA-256 of a file, read in blocks
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Inference function for a saved model: the forward pass compiled with XLA,
+# which skips model.predict()'s per-call batching and callback machinery.
+# The loaded model is reused until the file changes. Returns (infer_fn, sha256)
+def _get_infer_fn(model_path):
+    # One stat() per call doubles as the existence check
+    try:
+        mtime = os.path.getmtime(model_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Model not found: {model_path}") from None
+    cached = _MODEL_CACHE.get(model_path)
+    while cached is None or cached[0] != mtime:
+        digest = _file_digest(model_path)
+        model = _fold_batch_norm(keras.models.load_model(model_path))
+        infer_fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, model.input_shape[1]], tf.float32)],
+            jit_compile=True
+        )
+        cached = (mtime, model, infer_fn, digest)
+        # Replaced while loading: the digest may be of the other file, so load again
+        mtime = os.path.getmtime(model_path)
+    _MODEL_CACHE[model_path] = cached
+    return cached[2], cached[3]
+
+
+# Model and scalers for a prediction, loaded as a pair. retrain_model swaps
+# in the model file first and the scalers second, and the scalers record the
+# SHA-256 of the model they were fitted with. A reader between the two swaps
+# keeps the last matching pair, or waits briefly when it has none. Scaler
+# files without a digest pair with whatever model is present
+def _load_model_and_scalers(model_path, scaler_path):
+    for _ in range(PAIR_LOAD_ATTEMPTS):
+        infer_fn, digest = _get_infer_fn(model_path)
+        scalers = load_scalers(scaler_path)
+        if scalers.get('model_sha256', digest) == digest:
+            _PAIR_CACHE[(model_path, scaler_path)] = (infer_fn, scalers)
+            return infer_fn, scalers
+        pair = _PAIR_CACHE.get((model_path, scaler_path))
+        if pair is not None:
+            return pair
+        time.sleep(PAIR_LOAD_RETRY_DELAY)
+    raise RuntimeError(f"Scalers at {scaler_path} were not saved with the model at {model_path}")
+
+
+# Write a file through a temporary sibling and rename it into place, so
+# readers see either the old or the new file, never a partial one
+def _replace_file(path, write):
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
 
 
 # Predict churn for new data using trained model
@@ -53,17 +197,15 @@ def predict(input_data, model_path=None, scaler_path=None, threshold=0.5):
     if scaler_path is None:
         scaler_path = SCALER_PATH
 
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found: {model_path}")
-
-    model = keras.models.load_model(model_path)
+    infer_fn, scalers = _load_model_and_scalers(model_path, scaler_path)
 
-    # Convert to DataFrame
-    if isinstance(input_data, np.ndarray):
+    # Convert to DataFrame; a frame built here can be scaled in place
+    owned = isinstance(input_data, np.ndarray)
+    if owned:
         input_data = pd.DataFrame(input_data)
 
     # Preprocess using saved scalers
-    input_scaled = preprocess_with_scalers(input_data, scaler_path)
+    input_scaled = preprocess_with_scalers(input_data, scaler_path, copy=not owned, scalers=scalers)
 
     # Drop ID column if present
     id_cols = [col for col in input_scaled.columns if col.upper() == 'ID']
@@ -71,7 +213,7 @@ def predict(input_data, model_path=None, scaler_path=None, threshold=0.5):
         input_scaled = input_scaled.drop(columns=id_cols)
 
     # Predict
-    probabilities = model.predict(input_scaled).flatten()
+    probabilities = infer_fn(input_scaled.to_numpy(dtype=np.float32)).numpy().flatten()
     predictions = (probabilities >= threshold).astype(int)
 
     return {
@@ -81,13 +223,55 @@ def predict(input_data, model_path=None, scaler_path=None, threshold=0.5):
     }
 
 
+# Predict churn for a single record given as a {feature: value} dict.
+# Returns the same keys as predict(), with scalars instead of arrays; bad
+# feature values raise ValueError
+def predict_one(features, model_path=None, scaler_path=None, threshold=0.5):
+    if model_path is None:
+        model_path = MODEL_PATH
+    if scaler_path is None:
+        scaler_path = SCALER_PATH
+
+    infer_fn, scalers = _load_model_and_scalers(model_path, scaler_path)
+
+    # Scalers are stored in training column order, which is the order the model expects
+    feature_order = scalers['columns']
+    values = validate_record(features, feature_order)
+
+    X = np.fromiter((values[f] for f in feature_order), dtype=np.float64,
+                    count=len(feature_order)).reshape(1, -1)
+    X = scale_array(X, feature_order, scalers)
+
+    probability = float(infer_fn(X.astype(np.float32))[0, 0])
+    return {
+        'prediction': probability >= threshold,
+        'probability': probability,
+        'input_shape': X.shape
+    }
+
+
 # Retrain model on new labeled data
-def retrain_model(new_data_path, target_column='TARGET', load_existing=True,
-                  validation_split=0.0, epochs=100, batch_size=64, patience=15, verbose=1):
-    if not os.path.exists(new_data_path):
+# new_data: an in-memory DataFrame to train on instead of reading new_data_path
+# patience: early stopping on val_loss, only when validation_split > 0
+# existing_model: an already loaded model to continue training instead of
+# reading MODEL_PATH from disk (only used when load_existing is set)
+def retrain_model(new_data_path=None, target_column='TARGET', load_existing=True,
+                  validation_split=0.0, epochs=100, batch_size=64, patience=15, verbose=1,
+                  new_data=None, learning_rate=0.0005, existing_model=None):
+    if new_data is not None:
+        df = new_data
+    elif new_data_path is None:
+        raise ValueError("Either new_data or new_data_path is required")
+    elif not os.path.exists(new_data_path):
         raise FileNotFoundError(f"Data not found: {new_data_path}")
-
-    df = pd.read_csv(new_data_path)
+    elif new_data_path.endswith('.parquet'):
+        df = pd.read_parquet(new_data_path)
+    else:
+        try:
+            df = pd.read_csv(new_data_path, engine='pyarrow', dtype=TRAINING_CSV_DTYPES)
+        except ImportError:
+            # pyarrow not installed: the C parser reads the same dtypes
+            df = pd.read_csv(new_data_path, engine='c', dtype=TRAINING_CSV_DTYPES)
 
     if target_column not in df.columns:
         raise ValueError(f"Target column '{target_column}' not found")
@@ -102,53 +286,70 @@ def retrain_model(new_data_path, target_column='TARGET', load_existing=True,
     X = df.drop(columns_to_drop, axis=1)
     y = df[target_column]
 
-    # Preprocess and save scalers
+    # Fit scalers; they are saved with the model once training succeeds
     print("Preprocessing data")
-    X_scaled, _ = preprocess_and_fit(X, scaler_path=SCALER_PATH)
-
-    # Load existing model or build new one
-    if load_existing and os.path.exists(MODEL_PATH):
-        print(f"Loading existing model from {MODEL_PATH}")
-        model = keras.models.load_model(MODEL_PATH)
+    X_scaled, scalers = preprocess_and_fit(X, copy=False)
+
+    # Reuse the in-memory model, or build a compiled model and warm-start it
+    # from the saved weights (the saved optimizer state would be discarded)
+    if load_existing and existing_model is not None:
+        print("Continuing training of the in-memory model")
+        model = existing_model
+        compile_model(model, learning_rate)
     else:
-        print("Building new model")
         model = build_model(
             input_dim=X_scaled.shape[1],
-            learning_rate=0.0005,
+            learning_rate=learning_rate,
             dropout_rate=0.4,
             l2_reg=0.001,
             hidden_size=256
         )
+        if load_existing and os.path.exists(MODEL_PATH):
+            try:
+                model.load_weights(MODEL_PATH)
+                print(f"Loaded existing weights from {MODEL_PATH}")
+            except ValueError as e:
+                # e.g. the feature set changed since the model was saved
+                print(f"Existing model does not fit the data, building new model: {e}")
+                model = build_model(input_dim=X_scaled.shape[1], learning_rate=learning_rate)
+        else:
+            print("Building new model")
 
     # Calculate class weights for imbalanced data
-    classes = np.unique(y)
-    class_weights = compute_class_weight(class_weight='balanced', classes=classes, y=y)
-    class_weight_dict = dict(zip(classes, class_weights))
+    # 'balanced' weighting: n_samples / (n_classes * class count), as in sklearn
+    classes, counts = np.unique(y, return_counts=True)
+    class_weight_dict = dict(zip(classes.tolist(), (len(y) / (len(classes) * counts)).tolist()))
     print(f"Class weights: {class_weight_dict}")
 
-    # Recompile with focal loss
-    loss_fn = BinaryFocalCrossentropy(gamma=2, from_logits=False, alpha=0.25)
-    model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.0005),
-        loss=loss_fn,
-        metrics=['accuracy', keras.metrics.Precision(name='precision'),
-                 keras.metrics.Recall(name='recall'), keras.metrics.AUC(name='auc')]
-    )
+    # Stop once validation loss stops improving instead of always running every epoch
+    callbacks = []
+    if validation_split > 0:
+        callbacks.append(keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=patience, restore_best_weights=True))
 
-    # Train on entire labeled dataset (no validation split for retraining)
     print(f"\nRetraining on {len(X_scaled)} samples (using all labeled data)")
     history = model.fit(
-        X_scaled, y,
+        X_scaled.to_numpy(dtype=np.float32), y,
         epochs=epochs,
         batch_size=batch_size,
         validation_split=validation_split,
         verbose=verbose,
-        class_weight=class_weight_dict
+        class_weight=class_weight_dict,
+        callbacks=callbacks
     )
 
-    # Save model
+    # Save model and scalers once training succeeds. Each file is swapped in
+    # atomically, the model first; the two swaps are separate, so the scalers
+    # record the model's digest and readers load them as a pair (see
+    # _load_model_and_scalers)
     os.makedirs(ML_MODELS_DIR, exist_ok=True)
-    model.save(MODEL_PATH)
+
+    def save_model(path):
+        model.save(path)
+        scalers['model_sha256'] = _file_digest(path)
+
+    _replace_file(MODEL_PATH, save_model)
+    _replace_file(SCALER_PATH, lambda path: joblib.dump(scalers, path))
     print(f"\nModel saved to {MODEL_PATH}")
 
     # Final metrics (training metrics only since no validation split)
@@ -166,6 +367,7 @@ def retrain_model(new_data_path, target_column='TARGET', load_existing=True,
 
     return {
         'history': history,
+        'model': model,
         'final_metrics': final_metrics,
         'model_path': MODEL_PATH,
         'scaler_path': SCALER_PATH
@@ -1,9 +1,9 @@
 import os
-import json
 import shutil
 from datetime import datetime
 from pathlib import Path
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +16,42 @@ class ModelVersionManager:
         self.versions_dir.mkdir(parents=True, exist_ok=True)
         self.max_versions = max_versions
         self.metadata_file = self.versions_dir / "versions_metadata.json"
+        # Parsed metadata and the file mtime (ns) it was read at
+        self._cached = None
+        self._cached_mtime = None
 
-    # Load existing metadata
+    # Load existing metadata (parsed once per file change). The dict is shared
+    # with the cache: treat it as read-only and save changes on a copy
     def _load_metadata(self):
-        if self.metadata_file.exists():
-            with open(self.metadata_file, 'r') as f:
-                return json.load(f)
-        return {"versions": []}
+        try:
+            mtime = self.metadata_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"versions": []}
+
+        if self._cached is None or mtime != self._cached_mtime:
+            self._cached = orjson.loads(self.metadata_file.read_bytes())
+            self._cached_mtime = mtime
+        return self._cached
 
-    # Save metadata to file
+    # Save metadata to file atomically so a crash never leaves a partial file
     def _save_metadata(self, metadata):
-        with open(self.metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        tmp_file = self.metadata_file.with_name(self.metadata_file.name + ".tmp")
+        tmp_file.write_bytes(orjson.dumps(
+            metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        os.replace(tmp_file, self.metadata_file)
+        self._cached = metadata
+        self._cached_mtime = self.metadata_file.stat().st_mtime_ns
+
+    # Hard-link a saved file into a version dir, copying only across filesystems.
+    # Safe because the model and scaler are only ever replaced (os.replace), never
+    # rewritten in place, so a new save gets a new inode and the link keeps the old one
+    @staticmethod
+    def _link_or_copy(src, dst):
+        Path(dst).unlink(missing_ok=True)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
 
     # Save a new model version
     def save_new_version(self, model_path, scaler_path, metrics, training_info):
@@ -40,8 +64,8 @@ class ModelVersionManager:
             versioned_model_path = version_dir / Path(model_path).name
             versioned_scaler_path = version_dir / Path(scaler_path).name
 
-            shutil.copy2(model_path, versioned_model_path)
-            shutil.copy2(scaler_path, versioned_scaler_path)
+            self._link_or_copy(model_path, versioned_model_path)
+            self._link_or_copy(scaler_path, versioned_scaler_path)
 
             version_metadata = {
                 "version_id": version_id,
@@ -52,23 +76,21 @@ class ModelVersionManager:
                 "training_info": training_info
             }
 
-            metadata = self._load_metadata()
-            metadata["versions"].append(version_metadata)
-            metadata["versions"].sort(key=lambda v: v["timestamp"], reverse=True)
-
-            if len(metadata["versions"]) > self.max_versions:
-                for old_version in metadata["versions"][self.max_versions:]:
-                    old_dir = Path(old_version["model_path"]).parent
-                    if old_dir.exists():
-                        shutil.rmtree(old_dir)
-                        logger.info(f"Deleted version {old_version['version_id']}")
-
-                metadata["versions"] = metadata["versions"][:self.max_versions]
-
-            if metadata["versions"]:
-                metadata["latest_version"] = metadata["versions"][0]["version_id"]
+            # Work on a copy: the cache only changes once the write succeeds
+            metadata = dict(self._load_metadata())
+            # Versions are kept newest first, so the new one goes at the head
+            versions = [version_metadata] + metadata["versions"]
+            expired = versions[self.max_versions:]
+            metadata["versions"] = versions[:self.max_versions]
+            metadata["latest_version"] = version_id
 
             self._save_metadata(metadata)
+
+            for old_version in expired:
+                old_dir = Path(old_version["model_path"]).parent
+                if old_dir.exists():
+                    shutil.rmtree(old_dir)
+                    logger.info(f"Deleted version {old_version['version_id']}")
             logger.info(f"Saved version {version_id}, total: {len(metadata['versions'])}")
 
             return version_metadata
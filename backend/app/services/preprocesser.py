@@ -2,68 +2,139 @@ import numpy as np
 import pandas as pd
 import joblib
 import os
+import warnings
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 
+# Loaded scalers by path, as (mtime, scalers); reloaded when the file changes
+_SCALER_CACHE = {}
 
-def validate_types(df: pd.DataFrame) -> pd.DataFrame:
+BOOLEAN_FEATURES = ['pack_102', 'pack_103', 'pack_104', 'pack_105']
+INTEGER_FEATURES = ['id', 'age', 'clnt_setup_tenor']
+# All other numeric features should be float (except id, target, and boolean columns)
+
+# String spellings accepted for boolean features in single records
+BOOLEAN_STRINGS = {'true': True, 'false': False}
+
+
+def validate_types(df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
     """
     Validate and convert data types to ensure consistency.
+    All conversions happen in a single astype() call. With copy=False a frame
+    that needs no conversion is returned as is rather than copied.
     """
-    validated_df = df.copy()
-
-    BOOLEAN_FEATURES = ['pack_102', 'pack_103', 'pack_104', 'pack_105']
-    INTEGER_FEATURES = ['id', 'age', 'clnt_setup_tenor']
-    # All other numeric features should be float
+    dtype_map = {}
+    for column in df.columns:
+        if column in BOOLEAN_FEATURES:
+            dtype = np.dtype(bool)
+        elif column in INTEGER_FEATURES:
+            dtype = np.dtype(int)
+        elif (column.lower() not in BOOLEAN_FEATURES + INTEGER_FEATURES + ['target']
+              and pd.api.types.is_numeric_dtype(df[column])):
+            dtype = np.dtype(float)
+        else:
+            continue
+        if df[column].dtype != dtype:
+            dtype_map[column] = dtype
 
-    # Convert boolean features
-    for feature in BOOLEAN_FEATURES:
-        if feature in validated_df.columns:
-            validated_df[feature] = validated_df[feature].astype(bool)
+    # astype() returns a new frame, so it doubles as the copy
+    if dtype_map:
+        return df.astype(dtype_map)
+    return df.copy() if copy else df
 
-    # Convert integer features
-    for feature in INTEGER_FEATURES:
-        if feature in validated_df.columns:
-            validated_df[feature] = validated_df[feature].astype(int)
 
-    # Convert all other numeric columns to float (except id, target, and boolean columns)
-    for column in validated_df.columns:
-        if column.lower() not in BOOLEAN_FEATURES + INTEGER_FEATURES + ['target']:
-            if pd.api.types.is_numeric_dtype(validated_df[column]):
-                validated_df[column] = validated_df[column].astype(float)
+def validate_record(record: dict, columns) -> dict:
+    """
+    Validate and convert a single {feature: value} record, the one-row
+    counterpart of validate_types. Returns the `columns` values as bool, int
+    or float; numeric strings are accepted, and boolean features also take
+    'true'/'false'. Missing, non-numeric or non-finite values raise ValueError.
+    """
+    missing = [col for col in columns if col not in record]
+    if missing:
+        raise ValueError(f"Missing features: {missing}")
+
+    values = {}
+    invalid = []
+    for column in columns:
+        value = record[column]
+        if isinstance(value, str) and column in BOOLEAN_FEATURES:
+            value = BOOLEAN_STRINGS.get(value.strip().lower(), value)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            invalid.append(column)
+            continue
+        if not np.isfinite(number):
+            invalid.append(column)
+        elif column in BOOLEAN_FEATURES:
+            values[column] = bool(number)
+        elif column in INTEGER_FEATURES:
+            values[column] = int(number)
+        else:
+            values[column] = number
 
-    return validated_df
+    if invalid:
+        raise ValueError(f"Invalid values for features: {invalid}")
+    return values
 
 
-def preprocess_and_fit(input_df: pd.DataFrame, scaler_path: str = None) -> tuple:
+def preprocess_and_fit(input_df: pd.DataFrame, scaler_path: str = None, copy: bool = True) -> tuple:
     """
     Preprocess training data and fit scalers.
     Use this during model training to create and save scalers.
+    Pass copy=False when input_df is a throwaway frame: it may be scaled in place.
+
+    Every feature is scaled as (x - offset) * scale: standardized when its
+    skewness is below 0.5, min-max normalized otherwise. All statistics are
+    computed in one vectorized pass over the feature matrix, and the fitted
+    scalers are a dict of arrays aligned to 'columns' (see load_scalers).
     """
     # Validate and convert types first
-    validated_df = validate_types(input_df)
-
-    # Make a copy to avoid modifying in-place
-    processed_df = validated_df.copy()
-    scalers = {}
-
-    for feature in processed_df.columns:
-        # Skip ID and TARGET columns (case-insensitive)
-        if feature.upper() in ['ID', 'TARGET']:
-            continue
-
-        # Assess distribution (skewness)
-        data = processed_df[feature]
-        skewness = data.skew() if isinstance(data, pd.Series) else 0
-
-        # Select scaler based on distribution
-        if abs(skewness) < 0.5:
-            scaler = StandardScaler()
-        else:
-            scaler = MinMaxScaler()
-
-        # Fit and transform feature
-        processed_df[feature] = scaler.fit_transform(processed_df[[feature]])
-        scalers[feature] = scaler
+    processed_df = validate_types(input_df, copy=copy)
+
+    # Skip ID and TARGET columns (case-insensitive)
+    columns = [col for col in processed_df.columns if col.upper() not in ['ID', 'TARGET']]
+    X = processed_df[columns].to_numpy(dtype=np.float64)
+
+    # NaNs are ignored when fitting and passed through, as in sklearn
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns
+        missing = np.isnan(X)
+        count = len(X) - missing.sum(axis=0)
+        mean = np.nanmean(X, axis=0)
+        deviation = X - mean
+        if missing.any():
+            deviation[missing] = 0.0
+        deviation2 = deviation * deviation
+        m2 = deviation2.sum(axis=0)
+        m3 = (deviation2 * deviation).sum(axis=0)
+        std = np.sqrt(m2 / count)
+        data_min = np.nanmin(X, axis=0)
+        data_max = np.nanmax(X, axis=0)
+
+        # Assess distribution (skewness) from the same central moments, with
+        # pandas' bias correction and rounding guard so it matches .skew()
+        m2[m2 < 1e-14] = 0.0
+        skewness = (count * np.sqrt(count - 1) / (count - 2)) * (m3 / m2 ** 1.5)
+        skewness[m2 == 0] = 0.0
+        skewness[count < 3] = np.nan
+
+    # Select the scaling per feature
+    standard = np.abs(skewness) < 0.5
+
+    offset = np.where(standard, mean, data_min)
+    spread = np.where(standard, std, data_max - data_min)
+    # Constant features are only shifted, like sklearn's zero-scale handling
+    spread[~(spread >= 10 * np.finfo(np.float64).eps)] = 1.0
+    scale = 1.0 / spread
+
+    processed_df[columns] = (X - offset) * scale
+    scalers = {
+        'columns': columns,
+        'kind': ['standard' if is_standard else 'minmax' for is_standard in standard],
+        'offset': offset,
+        'scale': scale
+    }
 
     # Save scalers if path provided
     if scaler_path:
@@ -73,45 +144,105 @@ def preprocess_and_fit(input_df: pd.DataFrame, scaler_path: str = None) -> tuple
     return processed_df, scalers
 
 
-def preprocess_with_scalers(input_df: pd.DataFrame, scaler_path: str) -> pd.DataFrame:
+def _scalers_from_sklearn(sklearn_scalers: dict) -> dict:
     """
-    Preprocess data using pre-fitted scalers.
+    Convert the legacy {feature: fitted StandardScaler/MinMaxScaler} format
+    to the offset/scale arrays used by preprocess_and_fit.
     """
-    if not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"Scaler file not found at {scaler_path}")
+    columns, kind, offset, scale = [], [], [], []
+    for feature, scaler in sklearn_scalers.items():
+        if isinstance(scaler, StandardScaler):
+            # (x - mean_) / scale_
+            kind.append('standard')
+            offset.append(scaler.mean_[0] if scaler.mean_ is not None else 0.0)
+            scale.append(1.0 / scaler.scale_[0] if scaler.scale_ is not None else 1.0)
+        elif isinstance(scaler, MinMaxScaler):
+            # x * scale_ + min_ == (x - (-min_ / scale_)) * scale_
+            kind.append('minmax')
+            offset.append(-scaler.min_[0] / scaler.scale_[0])
+            scale.append(scaler.scale_[0])
+        else:
+            raise ValueError(f"Unsupported scaler for feature {feature}: {type(scaler).__name__}")
+        columns.append(feature)
 
-    # Validate and convert types first
-    validated_df = validate_types(input_df)
+    return {
+        'columns': columns,
+        'kind': kind,
+        'offset': np.asarray(offset, dtype=np.float64),
+        'scale': np.asarray(scale, dtype=np.float64)
+    }
 
-    # Load saved scalers
-    scalers = joblib.load(scaler_path)
 
-    # Make a copy
-    processed_df = validated_df.copy()
+def load_scalers(scaler_path: str) -> dict:
+    """
+    Load the saved scalers, reusing the cached copy until the file changes.
 
-    for feature in processed_df.columns:
-        # Skip ID and TARGET columns (case-insensitive)
-        if feature.upper() in ['ID', 'TARGET']:
-            continue
+    Returns a dict with 'columns' (training feature order), 'kind' and the
+    'offset'/'scale' arrays aligned to it. Scaler files from before the
+    vectorized format (one sklearn scaler per feature) are converted on load.
+    """
+    try:
+        mtime = os.path.getmtime(scaler_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Scaler file not found at {scaler_path}") from None
+    cached = _SCALER_CACHE.get(scaler_path)
+    if cached is None or cached[0] != mtime:
+        scalers = joblib.load(scaler_path)
+        if 'columns' not in scalers:
+            scalers = _scalers_from_sklearn(scalers)
+        cached = (mtime, scalers)
+        _SCALER_CACHE[scaler_path] = cached
+    return cached[1]
+
+
+def preprocess_with_scalers(input_df: pd.DataFrame, scaler_path: str, copy: bool = True,
+                            scalers: dict = None) -> pd.DataFrame:
+    """
+    Preprocess data using pre-fitted scalers.
+    Pass copy=False when input_df is a throwaway frame: it may be scaled in place.
+    Pass scalers when they are already loaded (see load_scalers) to skip scaler_path.
+    """
+    # Load saved scalers
+    if scalers is None:
+        scalers = load_scalers(scaler_path)
 
-        # Try case-insensitive lookup for better error handling
-        if feature not in scalers:
-            # Check if a lowercase version exists
-            feature_lower = feature.lower()
-            if feature_lower in scalers and feature_lower != feature:
-                raise ValueError(
-                    f"Feature name case mismatch: got '{feature}' but scaler has '{feature_lower}'. "
-                    f"Please ensure feature names are lowercase."
-                )
+    # Validate and convert types first
+    processed_df = validate_types(input_df, copy=copy)
+
+    # Skip ID and TARGET columns (case-insensitive)
+    columns = [col for col in processed_df.columns if col.upper() not in ['ID', 'TARGET']]
+
+    # Every feature needs a saved scaler
+    unknown = set(columns).difference(scalers['columns'])
+    if unknown:
+        feature = next(col for col in columns if col in unknown)
+        # Check if a lowercase version exists for better error handling
+        feature_lower = feature.lower()
+        if feature_lower in scalers['columns'] and feature_lower != feature:
             raise ValueError(
-                f"No scaler found for feature: {feature}. "
-                f"Available scalers: {list(scalers.keys())[:10]}..."
+                f"Feature name case mismatch: got '{feature}' but scaler has '{feature_lower}'. "
+                f"Please ensure feature names are lowercase."
             )
+        raise ValueError(
+            f"No scaler found for feature: {feature}. "
+            f"Available scalers: {scalers['columns'][:10]}..."
+        )
 
-        # Transform using saved scaler
-        scaler = scalers[feature]
-        processed_df[feature] = scaler.transform(processed_df[[feature]])
+    # Transform all features at once with the saved offsets and scales
+    processed_df[columns] = scale_array(processed_df[columns].to_numpy(dtype=np.float64), columns, scalers)
 
     return processed_df
 
 
+def scale_array(X: np.ndarray, columns, scalers: dict) -> np.ndarray:
+    """
+    Apply pre-fitted per-feature scalers to a numeric array whose columns
+    follow `columns`. Avoids building a DataFrame for small inputs.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if list(columns) == scalers['columns']:
+        return (X - scalers['offset']) * scalers['scale']
+
+    index = {feature: i for i, feature in enumerate(scalers['columns'])}
+    idx = [index[feature] for feature in columns]
+    return (X - scalers['offset'][idx]) * scalers['scale'][idx]
@@ -1,24 +1,91 @@
 import os
+import json
 import logging
+import pandas as pd
 from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.services.model_interface import retrain_model, MODEL_PATH, SCALER_PATH, ML_MODELS_DIR
-from app.services.data_export import export_labeled_data_to_csv, get_labeled_data_stats
+from apscheduler.executors.pool import ThreadPoolExecutor
+from app.services.model_interface import retrain_model, MODEL_PATH, ML_MODELS_DIR
+from app.services.data_export import count_labeled_data, load_labeled_data, get_labeled_data_stats
 from app.services.model_versioning import ModelVersionManager
 
 logger = logging.getLogger(__name__)
 
 
 class IntegratedRetrainingScheduler:
+    # Full training schedule
+    EPOCHS = 100
+    PATIENCE = 15
+    LEARNING_RATE = 0.0005
+    # Warm start: fine-tune the existing model when fewer labels than this
+    # changed, on the new rows plus a random replay sample of older ones
+    WARM_START_MAX_NEW_LABELS = 10_000
+    REPLAY_SAMPLE_SIZE = 10_000
+    WARM_START_PATIENCE = 3
+    WARM_START_LEARNING_RATE = 0.0001
+
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        # One worker, one instance: a run that outlasts the interval delays the
+        # next one (missed runs coalesce into one) instead of overlapping it
+        self.scheduler = BackgroundScheduler(
+            executors={'default': ThreadPoolExecutor(1)},
+            job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 3600}
+        )
         self.last_training_time = None
         self.training_count = 0
         self.enabled = False
         self.app = None
         self.version_manager = None
+        self.min_new_labels = 1
+        # Model from the last retrain and the MODEL_PATH mtime it was saved with
+        self._cached_model = None
+        self._cached_model_mtime = None
+        self._state_path = os.path.join(ML_MODELS_DIR, 'scheduler_state.json')
+        self.state_restored = self._load_state()
+
+    # Restore training state saved by a previous process; returns True if found
+    def _load_state(self):
+        if not os.path.exists(self._state_path):
+            return False
+        try:
+            with open(self._state_path, 'r') as f:
+                state = json.load(f)
+            last_training_time = state.get('last_training_time')
+            self.last_training_time = datetime.fromisoformat(last_training_time) if last_training_time else None
+            self.training_count = state.get('training_count', 0)
+            logger.info(f"Restored scheduler state: {self.training_count} trainings, last at {last_training_time}")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not load scheduler state: {e}")
+            return False
 
-    # Main retraining job - exports data from DB and retrains model
+    # Cached model, unless MODEL_PATH was replaced since it was saved
+    def _get_cached_model(self):
+        if self._cached_model is None:
+            return None
+        try:
+            if os.path.getmtime(MODEL_PATH) == self._cached_model_mtime:
+                return self._cached_model
+        except OSError:
+            pass
+        self._cached_model = None
+        return None
+
+    # Write training state atomically so a crash never leaves a partial file
+    def _save_state(self):
+        state = {
+            'last_training_time': self.last_training_time.isoformat() if self.last_training_time else None,
+            'training_count': self.training_count
+        }
+        tmp_path = f"{self._state_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self._state_path)
+        except Exception as e:
+            logger.warning(f"Could not save scheduler state: {e}")
+
+    # Main retraining job - loads labeled data from DB and retrains model
     def retrain_job(self):
         if not self.app:
             logger.error("Flask app not initialized")
@@ -35,55 +102,86 @@ class IntegratedRetrainingScheduler:
                     logger.warning("No labeled data found")
                     return
 
-                # Create CSV path for training data
-                training_data_dir = os.path.join(os.path.dirname(MODEL_PATH), 'training_datasets')
-                os.makedirs(training_data_dir, exist_ok=True)
-                temp_csv = os.path.join(
-                    training_data_dir,
-                    f"training_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                )
+                # Adaptive trigger: skip the run unless enough labels changed
+                if self.last_training_time is not None:
+                    new_labels = count_labeled_data(since=self.last_training_time)
+                    if new_labels < self.min_new_labels:
+                        logger.info(
+                            f"Skipping retraining: {new_labels} new labels "
+                            f"(minimum {self.min_new_labels})")
+                        return
 
-                # Export new data since last training (or all if first training)
+                # Load new data since last training (or all if first training)
                 if self.last_training_time is None:
-                    logger.info("First training: exporting all data")
-                    export_stats = export_labeled_data_to_csv(temp_csv, include_all=True)
+                    logger.info("First training: loading all data")
+                    df = load_labeled_data(include_all=True)
                 else:
-                    logger.info(f"Exporting data since: {self.last_training_time}")
-                    export_stats = export_labeled_data_to_csv(
-                        temp_csv,
-                        since=self.last_training_time,
-                        include_all=False
-                    )
+                    logger.info(f"Loading data since: {self.last_training_time}")
+                    df = load_labeled_data(since=self.last_training_time, include_all=False)
 
-                if export_stats['total_records'] == 0:
+                if df.empty:
                     logger.warning("No new data since last training")
-                    if os.path.exists(temp_csv):
-                        os.remove(temp_csv)
                     return
 
-                logger.info(f"Exported {export_stats['total_records']} records")
-
-            # Retrain model (incremental if model exists)
+                warm_start = (
+                    self.last_training_time is not None
+                    and os.path.exists(MODEL_PATH)
+                    and len(df) < self.WARM_START_MAX_NEW_LABELS
+                )
+                if warm_start:
+                    # Epochs scale with the share of labels that changed
+                    new_frac = len(df) / stats['total_labels']
+                    epochs = max(5, int(self.EPOCHS * new_frac))
+                    patience = self.WARM_START_PATIENCE
+                    learning_rate = self.WARM_START_LEARNING_RATE
+
+                    # Replay older labels so the model does not forget them
+                    replay = load_labeled_data(include_all=True, sample_size=self.REPLAY_SAMPLE_SIZE)
+                    df = pd.concat([df, replay], ignore_index=True).drop_duplicates('id')
+                    logger.info(f"Warm start: {epochs} epochs, {len(df)} records incl. replay")
+                else:
+                    epochs = self.EPOCHS
+                    patience = self.PATIENCE
+                    learning_rate = self.LEARNING_RATE
+
+                churned = int(df['TARGET'].sum())
+                data_stats = {
+                    'total_records': len(df),
+                    'churned': churned,
+                    'not_churned': len(df) - churned
+                }
+                logger.info(f"Loaded {data_stats['total_records']} records")
+
+            # Retrain model (incremental if model exists) on the in-memory data.
+            # Training updates the cached model in place, so drop it until the
+            # run succeeds
+            existing_model = self._get_cached_model()
+            self._cached_model = None
             results = retrain_model(
-                new_data_path=temp_csv,
+                new_data=df,
                 target_column='TARGET',
                 load_existing=os.path.exists(MODEL_PATH),
                 validation_split=0.2,
-                epochs=100,
+                epochs=epochs,
                 batch_size=64,
-                patience=15,
-                verbose=1
+                patience=patience,
+                verbose=1,
+                learning_rate=learning_rate,
+                existing_model=existing_model
             )
+            self._cached_model = results['model']
+            self._cached_model_mtime = os.path.getmtime(results['model_path'])
 
             # Save version using ModelVersionManager
             if self.version_manager:
                 try:
                     training_info = {
-                        "total_samples": export_stats.get('total_records', 0),
-                        "churned": export_stats.get('churned', 0),
-                        "not_churned": export_stats.get('not_churned', 0),
+                        "total_samples": data_stats.get('total_records', 0),
+                        "churned": data_stats.get('churned', 0),
+                        "not_churned": data_stats.get('not_churned', 0),
                         "training_mode": "initial" if self.last_training_time is None else "incremental",
-                        "epochs": 100,
+                        "warm_start": warm_start,
+                        "epochs": epochs,
                         "batch_size": 64
                     }
 
@@ -101,6 +199,7 @@ class IntegratedRetrainingScheduler:
             # Update tracking after successful training
             self.last_training_time = datetime.utcnow()
             self.training_count += 1
+            self._save_state()
 
             logger.info("Retraining completed")
             for metric, value in results['final_metrics'].items():
@@ -185,13 +284,14 @@ def init_scheduler(app):
 
     scheduler = get_scheduler()
     scheduler.app = app
+    scheduler.min_new_labels = app.config.get('RETRAIN_MIN_NEW_LABELS', 1)
 
     # Setup model versioning (keeps 3 versions)
     scheduler.version_manager = ModelVersionManager(ML_MODELS_DIR, max_versions=3)
     logger.info("Model versioning enabled")
 
-    # Restore state from latest version
-    latest_version = scheduler.version_manager.get_latest_version()
+    # No saved scheduler state: fall back to the latest model version
+    latest_version = None if scheduler.state_restored else scheduler.version_manager.get_latest_version()
     if latest_version:
         try:
             scheduler.last_training_time = datetime.fromisoformat(latest_version['timestamp'])
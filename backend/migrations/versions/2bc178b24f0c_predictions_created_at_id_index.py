@@ -0,0 +1,27 @@
+"""predictions created_at id index
+
+Serves the history listing: ORDER BY created_at DESC, id DESC and the
+(created_at, id) keyset cursor.
+
+Revision ID: 2bc178b24f0c
+Revises: e39ef48e02ee
+Create Date: 2026-10-16 04:01:47.469906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2bc178b24f0c'
+down_revision = 'e39ef48e02ee'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_predictions_created_at_id', 'predictions', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_predictions_created_at_id', table_name='predictions')
@@ -0,0 +1,83 @@
+"""initial schema
+
+The tables as db.create_all() built them before migrations existed.
+Databases created that way are already at this revision: run
+`flask db stamp 87e33bc4bfd5` once, then `flask db upgrade`.
+
+Revision ID: 87e33bc4bfd5
+Revises: 
+Create Date: 2026-10-16 04:00:21.252977
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '87e33bc4bfd5'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'customers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('amount_rub_clo_prc', sa.Float(), nullable=True),
+        sa.Column('sum_tran_aut_tendency3m', sa.Float(), nullable=True),
+        sa.Column('cnt_tran_aut_tendency3m', sa.Float(), nullable=True),
+        sa.Column('rest_avg_cur', sa.Float(), nullable=True),
+        sa.Column('cr_prod_cnt_tovr', sa.Float(), nullable=True),
+        sa.Column('trans_count_atm_prc', sa.Float(), nullable=True),
+        sa.Column('amount_rub_atm_prc', sa.Float(), nullable=True),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('cnt_tran_med_tendency3m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_med_tendency3m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_clo_tendency3m', sa.Float(), nullable=True),
+        sa.Column('cnt_tran_clo_tendency3m', sa.Float(), nullable=True),
+        sa.Column('cnt_tran_sup_tendency3m', sa.Float(), nullable=True),
+        sa.Column('turnover_dynamic_cur_1m', sa.Float(), nullable=True),
+        sa.Column('rest_dynamic_paym_3m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_sup_tendency3m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_atm_tendency3m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_sup_tendency1m', sa.Float(), nullable=True),
+        sa.Column('sum_tran_atm_tendency1m', sa.Float(), nullable=True),
+        sa.Column('cnt_tran_sup_tendency1m', sa.Float(), nullable=True),
+        sa.Column('turnover_dynamic_cur_3m', sa.Float(), nullable=True),
+        sa.Column('clnt_setup_tenor', sa.Integer(), nullable=True),
+        sa.Column('turnover_dynamic_paym_3m', sa.Float(), nullable=True),
+        sa.Column('turnover_dynamic_paym_1m', sa.Float(), nullable=True),
+        sa.Column('trans_amount_tendency3m', sa.Float(), nullable=True),
+        sa.Column('trans_cnt_tendency3m', sa.Float(), nullable=True),
+        sa.Column('pack_102', sa.Boolean(), nullable=True),
+        sa.Column('pack_103', sa.Boolean(), nullable=True),
+        sa.Column('pack_104', sa.Boolean(), nullable=True),
+        sa.Column('pack_105', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('id')
+    )
+    op.create_table(
+        'customer_labels',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id'], ['customers.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'predictions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('churn_probability', sa.Float(), nullable=False),
+        sa.Column('predicted_churn', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id'], ['customers.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('predictions')
+    op.drop_table('customer_labels')
+    op.drop_table('customers')
@@ -0,0 +1,26 @@
+"""customer_labels updated_at index
+
+Serves the scheduler's incremental "updated_at >= since" label loads.
+
+Revision ID: 946f41da90a7
+Revises: 9492769409ba
+Create Date: 2026-10-16 04:02:43.484634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '946f41da90a7'
+down_revision = '9492769409ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_customer_labels_updated_at', 'customer_labels', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_customer_labels_updated_at', table_name='customer_labels')
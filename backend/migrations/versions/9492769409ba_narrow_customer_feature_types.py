@@ -0,0 +1,75 @@
+"""narrow customer feature types
+
+Feature columns become single-precision REAL (the model trains in float32)
+and age / clnt_setup_tenor become SMALLINT. Values outside the SMALLINT range
+make the upgrade fail rather than wrap.
+
+Revision ID: 9492769409ba
+Revises: 2bc178b24f0c
+Create Date: 2026-10-16 04:02:20.268350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9492769409ba'
+down_revision = '2bc178b24f0c'
+branch_labels = None
+depends_on = None
+
+
+FLOAT_COLUMNS = [
+    'amount_rub_clo_prc',
+    'sum_tran_aut_tendency3m',
+    'cnt_tran_aut_tendency3m',
+    'rest_avg_cur',
+    'cr_prod_cnt_tovr',
+    'trans_count_atm_prc',
+    'amount_rub_atm_prc',
+    'cnt_tran_med_tendency3m',
+    'sum_tran_med_tendency3m',
+    'sum_tran_clo_tendency3m',
+    'cnt_tran_clo_tendency3m',
+    'cnt_tran_sup_tendency3m',
+    'turnover_dynamic_cur_1m',
+    'rest_dynamic_paym_3m',
+    'sum_tran_sup_tendency3m',
+    'sum_tran_atm_tendency3m',
+    'sum_tran_sup_tendency1m',
+    'sum_tran_atm_tendency1m',
+    'cnt_tran_sup_tendency1m',
+    'turnover_dynamic_cur_3m',
+    'turnover_dynamic_paym_3m',
+    'turnover_dynamic_paym_1m',
+    'trans_amount_tendency3m',
+    'trans_cnt_tendency3m',
+]
+SMALLINT_COLUMNS = ['age', 'clnt_setup_tenor']
+
+
+def _alter_types(float_type, int_type):
+    changes = ([(column, sa.Float(), float_type) for column in FLOAT_COLUMNS]
+               + [(column, sa.Integer(), int_type) for column in SMALLINT_COLUMNS])
+
+    if op.get_context().dialect.name == 'postgresql':
+        # One ALTER TABLE so Postgres rewrites the table once, not per column
+        dialect = op.get_context().dialect
+        clauses = ', '.join(
+            f"ALTER COLUMN {column} TYPE {new_type.compile(dialect=dialect)}"
+            for column, _, new_type in changes)
+        op.execute(f"ALTER TABLE customers {clauses}")
+        return
+
+    with op.batch_alter_table('customers') as batch_op:
+        for column, old_type, new_type in changes:
+            batch_op.alter_column(column, existing_type=old_type, type_=new_type)
+
+
+def upgrade():
+    _alter_types(sa.Float(precision=24), sa.SmallInteger())
+
+
+def downgrade():
+    _alter_types(sa.Float(), sa.Integer())
@@ -0,0 +1,53 @@
+"""server-filled timestamps
+
+Prediction and label timestamps become timezone-aware and are filled in by
+the database (DEFAULT now()) instead of by the app. Existing values were
+written with datetime.utcnow(), so they are read as UTC; NULLs are backfilled
+before the columns become NOT NULL.
+
+Revision ID: e39ef48e02ee
+Revises: 87e33bc4bfd5
+Create Date: 2026-10-16 04:01:03.632535
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e39ef48e02ee'
+down_revision = '87e33bc4bfd5'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs filled in by the database
+TIMESTAMP_COLUMNS = [
+    ('customer_labels', 'created_at'),
+    ('customer_labels', 'updated_at'),
+    ('predictions', 'created_at'),
+]
+
+
+def upgrade():
+    for table, column in TIMESTAMP_COLUMNS:
+        op.execute(sa.text(f"UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL"))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.DateTime(),
+                type_=sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=False,
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'")
+
+
+def downgrade():
+    for table, column in TIMESTAMP_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.DateTime(timezone=True),
+                type_=sa.DateTime(),
+                server_default=None,
+                nullable=True,
+                postgresql_using=f"{column} AT TIME ZONE 'UTC'")
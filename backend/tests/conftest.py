@@ -0,0 +1,29 @@
+"""
+Shared fixtures for the API tests: the 'testing' app (in-memory SQLite)
+with a fresh schema per test.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path to import the app package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -1,21 +1,25 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from app import create_app, db
-from app.models import Customer, CustomerLabel
+from app.models import Customer
 
 def read_customers_with_labels(limit=10):
     app = create_app()
     with app.app_context():
-        # Query customers left outer joined with labels
+        # One SELECT: customers LEFT OUTER JOIN labels, eager-loaded so that
+        # reading customer.labels below does not issue a query per row
         query = (
-            db.session.query(Customer, CustomerLabel)
-            .outerjoin(CustomerLabel, Customer.id == CustomerLabel.id)
+            select(Customer)
+            .options(joinedload(Customer.labels))
             .limit(limit)
         )
-        
-        for customer, label in query.all():
+
+        for customer in db.session.scalars(query).unique():
             print(f"Customer ID: {customer.id}")
             print(f"  Age: {customer.age}, REST_AVG_CUR: {customer.rest_avg_cur}")
-            if label:
-                print(f"  Target: {label.target}")
+            # customer_labels.id is both PK and FK, so there is at most one
+            if customer.labels:
+                print(f"  Target: {customer.labels[0].target}")
             else:
                 print("  Target: (unlabelled)")
             print("-" * 30)
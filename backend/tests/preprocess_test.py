@@ -31,4 +31,4 @@ print("Original record:")
 print(df.head())
 print("\nProcessed record:")
 print(processed.head())
-print(f"\nNumber of features scaled: {len(scalers)}")
\ No newline at end of file
+print(f"\nNumber of features scaled: {len(scalers['columns'])}")
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Tests for the /api/feedback label endpoints and the label upsert behind them.
+"""
+
+import pytest
+
+from app import db
+from app.models import Customer, CustomerLabel
+from app.routes.feedback_routes import _upsert_label
+
+
+def add_customers(ids, labels=None):
+    """Create customers, plus labels for the {id: target} pairs in labels."""
+    db.session.add_all(Customer(id=customer_id) for customer_id in ids)
+    db.session.flush()
+    db.session.add_all(CustomerLabel(id=customer_id, target=target)
+                       for customer_id, target in (labels or {}).items())
+    db.session.commit()
+
+
+def stored_labels():
+    db.session.expire_all()
+    return {label.id: label.target for label in db.session.query(CustomerLabel)}
+
+
+@pytest.fixture
+def bulk_calls(monkeypatch):
+    """Record the mappings passed to the session's bulk insert/update."""
+    calls = {'insert': [], 'update': []}
+    bulk_insert = db.session.bulk_insert_mappings
+    bulk_update = db.session.bulk_update_mappings
+
+    def record_insert(mapper, mappings, *args, **kwargs):
+        calls['insert'].append(list(mappings))
+        return bulk_insert(mapper, mappings, *args, **kwargs)
+
+    def record_update(mapper, mappings, *args, **kwargs):
+        calls['update'].append(list(mappings))
+        return bulk_update(mapper, mappings, *args, **kwargs)
+
+    monkeypatch.setattr(db.session, 'bulk_insert_mappings', record_insert)
+    monkeypatch.setattr(db.session, 'bulk_update_mappings', record_update)
+    return calls
+
+
+class TestUpsertLabel:
+    """Tests for the single-label insert-or-update"""
+
+    def test_reports_created_then_updated(self, app):
+        """The first upsert creates the row, the second updates it"""
+        add_customers([1])
+
+        assert _upsert_label(1, True) is True
+        db.session.commit()
+        assert _upsert_label(1, False) is False
+        db.session.commit()
+
+        assert stored_labels() == {1: False}
+
+
+class TestAddLabel:
+    """Tests for POST /api/feedback/add-label"""
+
+    def test_created_is_201_and_updated_is_200(self, client):
+        """A new label answers 201, relabeling the same customer 200"""
+        add_customers([1])
+
+        response = client.post('/api/feedback/add-label', json={'customer_id': 1, 'target': True})
+        assert response.status_code == 201
+        assert response.get_json()['updated'] is False
+
+        response = client.post('/api/feedback/add-label', json={'customer_id': 1, 'target': False})
+        assert response.status_code == 200
+        assert response.get_json()['updated'] is True
+
+        assert stored_labels() == {1: False}
+
+    def test_missing_customer_is_404(self, client):
+        """Labels for unknown customers are rejected"""
+        response = client.post('/api/feedback/add-label', json={'customer_id': 99, 'target': True})
+
+        assert response.status_code == 404
+        assert stored_labels() == {}
+
+
+class TestBatchLabels:
+    """Tests for POST /api/feedback/batch-labels"""
+
+    def post(self, client, labels):
+        return client.post('/api/feedback/batch-labels', json={'labels': labels})
+
+    def test_inserts_and_updates_in_one_bulk_call_each(self, client, bulk_calls):
+        """New labels go to one bulk insert, existing ones to one bulk update"""
+        add_customers([1, 2, 3, 4], labels={3: False, 4: True})
+
+        response = self.post(client, [
+            {'customer_id': 1, 'target': True},
+            {'customer_id': 3, 'target': True},
+            {'customer_id': 2, 'target': False},
+            {'customer_id': 4, 'target': False},
+        ])
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert (data['added'], data['updated'], data['errors']) == (2, 2, [])
+        assert bulk_calls['insert'] == [[{'id': 1, 'target': True}, {'id': 2, 'target': False}]]
+        assert bulk_calls['update'] == [[{'id': 3, 'target': True}, {'id': 4, 'target': False}]]
+        assert stored_labels() == {1: True, 2: False, 3: True, 4: False}
+
+    def test_mixed_valid_and_invalid_entries(self, client):
+        """Invalid entries are reported by index while valid ones are stored"""
+        add_customers([1, 2])
+
+        response = self.post(client, [
+            {'customer_id': 1, 'target': True},
+            {'customer_id': 2, 'target': 'yes'},
+            {'target': False},
+            'not an object',
+            {'customer_id': 2, 'target': False},
+        ])
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert (data['added'], data['updated']) == (2, 0)
+        assert [error['index'] for error in data['errors']] == [1, 2, 3]
+        assert data['errors'][0]['customer_id'] == 2
+        assert 'customer_id' not in data['errors'][1]
+        assert stored_labels() == {1: True, 2: False}
+
+    def test_missing_customer_is_reported(self, client):
+        """Unknown customer ids are skipped with an error"""
+        add_customers([1])
+
+        response = self.post(client, [
+            {'customer_id': 99, 'target': True},
+            {'customer_id': 1, 'target': True},
+        ])
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['added'] == 1
+        assert data['errors'] == [{'index': 0, 'customer_id': 99, 'error': 'Customer not found'}]
+        assert stored_labels() == {1: True}
+
+    def test_duplicate_ids_last_value_wins(self, client, bulk_calls):
+        """A repeated customer id is written once, with its last value"""
+        add_customers([1, 2], labels={2: True})
+
+        response = self.post(client, [
+            {'customer_id': 1, 'target': True},
+            {'customer_id': 2, 'target': False},
+            {'customer_id': 1, 'target': False},
+            {'customer_id': 2, 'target': True},
+        ])
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert (data['added'], data['updated'], data['errors']) == (1, 3, [])
+        assert bulk_calls['insert'] == [[{'id': 1, 'target': False}]]
+        assert bulk_calls['update'] == [[{'id': 2, 'target': True}]]
+        assert stored_labels() == {1: False, 2: True}
+
+    @pytest.mark.parametrize('body, error', [
+        (b'{"labels": [', 'Invalid JSON'),
+        (b'{"labels": {"customer_id": 1}}', 'labels must be a non-empty list'),
+        (b'{"labels": []}', 'labels must be a non-empty list'),
+        (b'', 'No data provided'),
+    ])
+    def test_malformed_bodies_are_400(self, client, body, error):
+        """Bodies that are not a JSON object with a labels list are rejected"""
+        response = client.post('/api/feedback/batch-labels', data=body,
+                               content_type='application/json')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == error
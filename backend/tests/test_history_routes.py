@@ -0,0 +1,111 @@
+"""
+Tests for the /api/history/recent listing and its (created_at, id) keyset cursor.
+"""
+
+from datetime import datetime
+
+from app import db
+from app.models import Customer, Prediction
+from app.routes.history_routes import decode_cursor, encode_cursor
+
+# All rows share one timestamp, as server defaults within one second do
+CREATED_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def add_predictions(ids, created_at=CREATED_AT):
+    for customer_id in ids:
+        db.session.add_all([
+            Customer(id=customer_id),
+            Prediction(id=customer_id, churn_probability=0.5, predicted_churn=False,
+                       created_at=created_at)
+        ])
+    db.session.commit()
+
+
+def fetch_all_pages(client, limit):
+    """Follow next_before until it runs out; returns (ids, pages)."""
+    ids, pages, before = [], 0, None
+    while True:
+        params = {'limit': limit}
+        if before:
+            params['before'] = before
+        response = client.get('/api/history/recent', query_string=params)
+        assert response.status_code == 200
+        data = response.get_json()
+        ids += [p['id'] for p in data['predictions']]
+        pages += 1
+        before = data['next_before']
+        if before is None:
+            return ids, pages
+        assert pages < 20, "cursor did not advance"
+
+
+class TestRecentHistory:
+    """Tests for paging through prediction history"""
+
+    def test_pages_across_equal_timestamps(self, client):
+        """Rows sharing created_at are neither skipped nor repeated"""
+        add_predictions([5, 3, 9, 1, 7, 2, 8])
+
+        ids, pages = fetch_all_pages(client, limit=3)
+
+        assert ids == [9, 8, 7, 5, 3, 2, 1]
+        assert pages == 3
+
+    def test_orders_newest_first(self, client):
+        """Newer predictions come first, id breaks ties"""
+        add_predictions([1, 2])
+        add_predictions([3], created_at=datetime(2025, 6, 1))
+        add_predictions([4], created_at=datetime(2026, 6, 1))
+
+        ids, _ = fetch_all_pages(client, limit=2)
+
+        assert ids == [4, 2, 1, 3]
+
+    def test_last_page_has_no_cursor(self, client):
+        """A short page ends the listing"""
+        add_predictions([1, 2])
+
+        data = client.get('/api/history/recent?limit=5').get_json()
+
+        assert data['count'] == 2
+        assert data['next_before'] is None
+
+    def test_full_last_page_is_followed_by_empty_page(self, client):
+        """When the rows fill the last page exactly, the next page is empty"""
+        add_predictions([1, 2])
+
+        first = client.get('/api/history/recent?limit=2').get_json()
+        assert first['next_before'] is not None
+
+        last = client.get('/api/history/recent',
+                          query_string={'limit': 2, 'before': first['next_before']}).get_json()
+        assert last['predictions'] == []
+        assert last['next_before'] is None
+
+    def test_malformed_cursor(self, client):
+        """A before value that is not a cursor is rejected with 400"""
+        for before in ('garbage', '2026-01-01T12:00:00', '2026-01-01T12:00:00_x', 'not-a-date_5'):
+            response = client.get('/api/history/recent', query_string={'before': before})
+            assert response.status_code == 400
+            assert response.get_json()['success'] is False
+
+    def test_cursor_is_url_safe(self, client):
+        """next_before needs no URL encoding ('+' would decode as a space)"""
+        add_predictions([1, 2])
+
+        cursor = client.get('/api/history/recent?limit=1').get_json()['next_before']
+
+        assert '+' not in cursor and ' ' not in cursor
+        assert decode_cursor(cursor)[1] == 2
+
+
+class TestCursor:
+    """Tests for encode_cursor/decode_cursor"""
+
+    def test_round_trip(self):
+        """A naive UTC timestamp and id survive the round trip"""
+        created_at, prediction_id = decode_cursor(encode_cursor(CREATED_AT, 42))
+
+        assert created_at.replace(tzinfo=None) == CREATED_AT
+        assert prediction_id == 42
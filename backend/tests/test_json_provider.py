@@ -0,0 +1,51 @@
+"""
+Tests for the orjson-backed JSON provider.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+
+class TestOrjsonProvider:
+    """Tests for app.json (OrjsonProvider)"""
+
+    def test_serializes_numpy_and_datetimes(self, app):
+        """numpy scalars and naive datetimes (as UTC) serialize natively"""
+        body = app.json.dumps({'p': np.float32(0.5), 'at': datetime(2026, 1, 1)})
+
+        assert body == '{"at":"2026-01-01T00:00:00+00:00","p":0.5}'
+
+    def test_honours_sort_keys_and_indent(self, app):
+        """sort_keys and indent=2 map to orjson options"""
+        assert app.json.dumps({'b': 1, 'a': 2}, sort_keys=False) == '{"b":1,"a":2}'
+        assert app.json.dumps({'a': [1]}, indent=2) == '{\n  "a": [\n    1\n  ]\n}'
+        assert app.json.dumps({'a': 1}, separators=(',', ':'), ensure_ascii=False) == '{"a":1}'
+
+    @pytest.mark.parametrize('kwargs', [
+        {'indent': 4},
+        {'separators': (', ', ': ')},
+        {'ensure_ascii': True},
+        {'cls': object},
+    ])
+    def test_rejects_arguments_it_cannot_honour(self, app, kwargs):
+        """json.dumps() options orjson has no equivalent for raise TypeError"""
+        with pytest.raises(TypeError):
+            app.json.dumps({}, **kwargs)
+
+    def test_response_arguments(self, app):
+        """One value, several values (a list) or keywords (an object), like Flask"""
+        assert app.json.response({'a': 1}).get_data() == b'{"a":1}'
+        assert app.json.response(1, 2).get_data() == b'[1,2]'
+        assert app.json.response(b=1, a=2).get_data() == b'{"a":2,"b":1}'
+        assert app.json.response().get_data() == b'null'
+        assert app.json.response(1).mimetype == 'application/json'
+        with pytest.raises(TypeError):
+            app.json.response(1, a=2)
+
+    def test_response_pretty_when_not_compact(self, app, monkeypatch):
+        """compact=False pretty-prints responses"""
+        monkeypatch.setattr(app.json, 'compact', False)
+
+        assert app.json.response({'a': 1}).get_data() == b'{\n  "a": 1\n}'
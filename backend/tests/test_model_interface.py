@@ -9,13 +9,16 @@ import pandas as pd
 import os
 import tempfile
 import shutil
-from unittest.mock import Mock, patch, MagicMock
 import sys
 
 # Add parent directory to path to import model_interface
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from backend.app.services.model_interface import build_model, predict, retrain_model
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from backend.app.services import model_interface
+from backend.app.services.model_interface import build_model, predict, retrain_model, _fold_batch_norm
 
 
 class TestBuildModel:
@@ -81,6 +84,137 @@ class TestBuildModel:
         assert abs(lr - 0.0005) < 1e-6
 
 
+class TestFoldBatchNorm:
+    """Test suite for folding BatchNormalization into Dense weights"""
+
+    @staticmethod
+    def randomize_batch_norm(model, seed=0):
+        """Give every BatchNormalization non-trivial gamma/beta and moving statistics"""
+        rng = np.random.default_rng(seed)
+        for layer in model.layers:
+            if isinstance(layer, layers.BatchNormalization):
+                n = layer.get_weights()[0].shape[0]
+                layer.set_weights([
+                    rng.uniform(0.5, 2.0, n), rng.normal(0.0, 0.5, n),
+                    rng.normal(0.0, 1.0, n), rng.uniform(0.1, 3.0, n)
+                ])
+        return model
+
+    def test_folded_model_matches_original(self):
+        """Folded predictions match the unfolded model in inference mode"""
+        model = self.randomize_batch_norm(build_model(20, hidden_size=64))
+        X = np.random.default_rng(1).normal(size=(256, 20)).astype(np.float32)
+
+        folded = _fold_batch_norm(model)
+
+        assert folded is not model
+        assert not any(isinstance(layer, (layers.BatchNormalization, layers.Dropout))
+                       for layer in folded.layers)
+        np.testing.assert_allclose(folded(X, training=False).numpy(),
+                                   model(X, training=False).numpy(), rtol=1e-4, atol=1e-5)
+
+    def test_consecutive_batch_norms_fold(self):
+        """Stacked BatchNormalization layers fold into one affine map"""
+        model = self.randomize_batch_norm(keras.Sequential([
+            layers.Input(shape=(8,)),
+            layers.Dense(16, activation='relu'),
+            layers.BatchNormalization(),
+            layers.BatchNormalization(),
+            layers.Dense(1, activation='sigmoid')
+        ]))
+        X = np.random.default_rng(2).normal(size=(64, 8)).astype(np.float32)
+
+        folded = _fold_batch_norm(model)
+
+        assert len(folded.layers) == 2
+        np.testing.assert_allclose(folded(X, training=False).numpy(),
+                                   model(X, training=False).numpy(), rtol=1e-4, atol=1e-5)
+
+    def test_unsupported_stacks_are_returned_unchanged(self):
+        """Trailing BatchNormalization or other layer types are not folded"""
+        trailing = keras.Sequential([
+            layers.Input(shape=(8,)), layers.Dense(4), layers.BatchNormalization()
+        ])
+        other = keras.Sequential([
+            layers.Input(shape=(8,)), layers.Dense(4), layers.Activation('relu'), layers.Dense(1)
+        ])
+
+        assert _fold_batch_norm(trailing) is trailing
+        assert _fold_batch_norm(other) is other
+
+
+class TestModelScalerPair:
+    """Test suite for loading the model and scalers as a matching pair"""
+
+    @staticmethod
+    def save_model(model_path, age=0):
+        """Save a fresh model; age shifts its mtime so each save is distinct"""
+        build_model(input_dim=4, hidden_size=8).save(model_path)
+        mtime = os.path.getmtime(model_path) + age
+        os.utime(model_path, (mtime, mtime))
+
+    @staticmethod
+    def save_scalers(scaler_path, model_path, age=0):
+        """Save identity scalers recording the digest of the model at model_path"""
+        import joblib
+
+        joblib.dump({
+            'columns': ['a', 'b', 'c', 'd'],
+            'kind': ['standard'] * 4,
+            'offset': np.zeros(4),
+            'scale': np.ones(4),
+            'model_sha256': model_interface._file_digest(model_path)
+        }, scaler_path)
+        mtime = os.path.getmtime(scaler_path) + age
+        os.utime(scaler_path, (mtime, mtime))
+
+    def test_keeps_last_pair_between_swaps(self, tmp_path):
+        """A new model is only used once the scalers saved with it are in place"""
+        model_path, scaler_path = str(tmp_path / 'model.keras'), str(tmp_path / 'scaler.pkl')
+        self.save_model(model_path)
+        self.save_scalers(scaler_path, model_path)
+        first = model_interface._load_model_and_scalers(model_path, scaler_path)
+
+        # Retrain has swapped the model but not yet the scalers
+        self.save_model(model_path, age=10)
+        assert model_interface._load_model_and_scalers(model_path, scaler_path) == first
+
+        self.save_scalers(scaler_path, model_path, age=10)
+        infer_fn, scalers = model_interface._load_model_and_scalers(model_path, scaler_path)
+        assert infer_fn is not first[0]
+        assert scalers['model_sha256'] == model_interface._file_digest(model_path)
+
+    def test_mismatch_without_previous_pair(self, tmp_path, monkeypatch):
+        """With no matching pair to fall back on, a lasting mismatch is an error"""
+        monkeypatch.setattr(model_interface, 'PAIR_LOAD_ATTEMPTS', 2)
+        monkeypatch.setattr(model_interface, 'PAIR_LOAD_RETRY_DELAY', 0)
+        model_path, scaler_path = str(tmp_path / 'model.keras'), str(tmp_path / 'scaler.pkl')
+        self.save_model(model_path)
+        self.save_scalers(scaler_path, model_path)
+        self.save_model(model_path, age=10)
+
+        with pytest.raises(RuntimeError, match='were not saved with the model'):
+            model_interface._load_model_and_scalers(model_path, scaler_path)
+
+    def test_retrain_saves_a_matching_pair(self, tmp_path, monkeypatch):
+        """retrain_model records the saved model's digest in the scalers"""
+        import joblib
+
+        model_path, scaler_path = str(tmp_path / 'model.keras'), str(tmp_path / 'scaler.pkl')
+        monkeypatch.setattr(model_interface, 'ML_MODELS_DIR', str(tmp_path))
+        monkeypatch.setattr(model_interface, 'MODEL_PATH', model_path)
+        monkeypatch.setattr(model_interface, 'SCALER_PATH', scaler_path)
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(rng.normal(size=(64, 4)), columns=['a', 'b', 'c', 'd'])
+        df['TARGET'] = rng.integers(0, 2, 64)
+
+        retrain_model(new_data=df, load_existing=False, epochs=1, validation_split=0, verbose=0)
+
+        assert joblib.load(scaler_path)['model_sha256'] == model_interface._file_digest(model_path)
+        results = predict(df.drop(columns='TARGET'), model_path=model_path, scaler_path=scaler_path)
+        assert len(results['probabilities']) == 64
+
+
 class TestPredict:
     """Test suite for predict function"""
 
@@ -96,7 +230,6 @@ class TestPredict:
         """Create a sample model and scaler for testing"""
         from sklearn.preprocessing import StandardScaler
         import joblib
-        from tensorflow import keras
 
         # Create sample scaler
         scaler = StandardScaler()
@@ -182,7 +315,6 @@ class TestPredict:
 
     def test_predict_scaler_not_found(self, temp_dir):
         """Test that predict raises error when scaler file doesn't exist"""
-        from tensorflow import keras
 
         # Create and save a model but not scaler
         model = build_model(input_dim=20)
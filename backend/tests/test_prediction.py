@@ -149,7 +149,7 @@ try:
 except FileNotFoundError as e:
     print(f"ERROR: {e}")
     print("\nModel files not found. Please train the model first by running:")
-    print("  cd backend && python app/scripts/train_from_db.py")
+    print("  cd backend && python -m app.scripts.train_from_db")
 except Exception as e:
     print(f"ERROR: {e}")
     import traceback
@@ -0,0 +1,88 @@
+"""
+Tests for /api/prediction/single and the record validation in front of it.
+"""
+
+import pytest
+
+from app import db
+from app.models import Customer, Prediction, FEATURE_COLUMNS
+from app.services.preprocesser import validate_record
+
+CUSTOMER = {
+    'amount_rub_clo_prc': 0.0, 'sum_tran_aut_tendency3m': 0.689079823, 'cnt_tran_aut_tendency3m': 1.0,
+    'rest_avg_cur': 44413.93297, 'cr_prod_cnt_tovr': 1.0, 'trans_count_atm_prc': 0.566037736,
+    'amount_rub_atm_prc': 0.962548494, 'age': 44, 'cnt_tran_med_tendency3m': 1.0,
+    'sum_tran_med_tendency3m': 0.794423413, 'sum_tran_clo_tendency3m': 0.795942905,
+    'cnt_tran_clo_tendency3m': 1.0, 'cnt_tran_sup_tendency3m': 1.0, 'turnover_dynamic_cur_1m': 0.000995891,
+    'rest_dynamic_paym_3m': 0.0, 'sum_tran_sup_tendency3m': 0.627334163, 'sum_tran_atm_tendency3m': 0.039130435,
+    'sum_tran_sup_tendency1m': 0.212211825, 'sum_tran_atm_tendency1m': 0.203741054,
+    'cnt_tran_sup_tendency1m': 1.0, 'turnover_dynamic_cur_3m': 0.04363302, 'clnt_setup_tenor': 2,
+    'turnover_dynamic_paym_3m': 2.240872349, 'turnover_dynamic_paym_1m': 0.0, 'trans_amount_tendency3m': 0.0,
+    'trans_cnt_tendency3m': 0.041739869, 'pack_102': False, 'pack_103': False, 'pack_104': False,
+    'pack_105': False
+}
+
+
+class TestValidateRecord:
+    """Tests for coercing a single JSON record"""
+
+    def test_coerces_numeric_and_boolean_strings(self):
+        """Numeric strings and 'true'/'false' convert to the column types"""
+        record = dict(CUSTOMER, age='44', rest_avg_cur='44413.93297', pack_102='true', pack_103='False')
+
+        values = validate_record(record, FEATURE_COLUMNS)
+
+        assert values['age'] == 44 and isinstance(values['age'], int)
+        assert values['rest_avg_cur'] == pytest.approx(44413.93297)
+        assert values['pack_102'] is True
+        assert values['pack_103'] is False
+
+    @pytest.mark.parametrize('value', [None, 'abc', '', [1], float('nan')])
+    def test_rejects_invalid_values(self, value):
+        """Values with no numeric reading raise ValueError naming the feature"""
+        with pytest.raises(ValueError, match='rest_avg_cur'):
+            validate_record(dict(CUSTOMER, rest_avg_cur=value), FEATURE_COLUMNS)
+
+    def test_rejects_missing_features(self):
+        """Absent features raise ValueError"""
+        record = {k: v for k, v in CUSTOMER.items() if k != 'age'}
+
+        with pytest.raises(ValueError, match='Missing features'):
+            validate_record(record, FEATURE_COLUMNS)
+
+
+class TestPredictSingle:
+    """Tests for the single prediction endpoint"""
+
+    @pytest.mark.parametrize('changes', [
+        {'age': None},
+        {'rest_avg_cur': 'abc'},
+        {'pack_104': 'maybe'},
+    ])
+    def test_bad_features_are_client_errors(self, client, changes):
+        """Invalid feature values return 400 and store nothing"""
+        response = client.post('/api/prediction/single', json=dict(CUSTOMER, **changes))
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid features'
+        assert db.session.query(Customer).count() == 0
+
+    def test_string_values_are_coerced_and_stored(self, client):
+        """String inputs score like their numeric values and are stored typed"""
+        response = client.post('/api/prediction/single', json=dict(CUSTOMER, id=7))
+        assert response.status_code == 200
+        expected = response.get_json()['prediction']['probabilities'][0]
+        db.session.query(Prediction).delete()
+        db.session.query(Customer).delete()
+        db.session.commit()
+
+        record = dict(CUSTOMER, id=7, age='44', rest_avg_cur='44413.93297', pack_102='false')
+        response = client.post('/api/prediction/single', json=record)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['prediction']['probabilities'][0] == pytest.approx(expected)
+        assert data['prediction']['input_shape'] == [1, len(FEATURE_COLUMNS)]
+        customer = db.session.get(Customer, 7)
+        assert customer.age == 44
+        assert customer.pack_102 is False
@@ -0,0 +1,152 @@
+"""
+Tests for preprocesser.py
+Checks the vectorized scalers against the per-feature sklearn scalers they replaced.
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler, MinMaxScaler
+
+from app.services.preprocesser import (
+    _scalers_from_sklearn, load_scalers, preprocess_and_fit, preprocess_with_scalers, scale_array
+)
+
+
+def sklearn_fit(df):
+    """The original fit: one StandardScaler or MinMaxScaler per feature, picked by skewness."""
+    processed_df = df.copy()
+    scalers = {}
+    for feature in processed_df.columns:
+        if feature.upper() in ['ID', 'TARGET']:
+            continue
+        scaler = StandardScaler() if abs(processed_df[feature].skew()) < 0.5 else MinMaxScaler()
+        processed_df[feature] = scaler.fit_transform(processed_df[[feature]])
+        scalers[feature] = scaler
+    return processed_df, scalers
+
+
+def sklearn_transform(df, scalers):
+    processed_df = df.copy()
+    for feature, scaler in scalers.items():
+        processed_df[feature] = scaler.transform(processed_df[[feature]])
+    return processed_df
+
+
+def make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'rest_avg_cur': rng.normal(1000.0, 250.0, n),          # symmetric: standard
+        'turnover_dynamic_cur_1m': rng.exponential(2.0, n),    # skewed: min-max
+        'amount_rub_clo_prc': rng.uniform(0.0, 1.0, n),
+        'age': rng.integers(18, 80, n),
+        'cr_prod_cnt_tovr': np.full(n, 3.0),                   # constant
+        'TARGET': rng.integers(0, 2, n),
+    })
+    df.loc[rng.choice(n, n // 10, replace=False), 'rest_avg_cur'] = np.nan
+    return df
+
+
+@pytest.fixture
+def train_df():
+    return make_frame(500, seed=0)
+
+
+@pytest.fixture
+def new_df():
+    return make_frame(50, seed=1)
+
+
+class TestPreprocessAndFit:
+    """The vectorized fit must reproduce the sklearn fit"""
+
+    def test_matches_sklearn_fit_transform(self, train_df):
+        """Same scaler choice per feature and the same scaled values"""
+        expected_df, expected_scalers = sklearn_fit(train_df)
+
+        processed_df, scalers = preprocess_and_fit(train_df)
+
+        expected_kinds = ['standard' if isinstance(s, StandardScaler) else 'minmax'
+                          for s in expected_scalers.values()]
+        assert scalers['columns'] == list(expected_scalers)
+        assert scalers['kind'] == expected_kinds
+        assert set(expected_kinds) == {'standard', 'minmax'}
+        pd.testing.assert_frame_equal(processed_df, expected_df, check_dtype=False, rtol=1e-9)
+
+    def test_saved_scalers_transform_like_sklearn(self, train_df, new_df, tmp_path):
+        """preprocess_with_scalers and scale_array match sklearn's transform on unseen data"""
+        _, expected_scalers = sklearn_fit(train_df)
+        expected_df = sklearn_transform(new_df, expected_scalers)
+        scaler_path = str(tmp_path / 'scaler.pkl')
+        preprocess_and_fit(train_df, scaler_path=scaler_path)
+
+        processed_df = preprocess_with_scalers(new_df, scaler_path)
+        scalers = load_scalers(scaler_path)
+        columns = scalers['columns'][::-1]  # out of training order
+        X = scale_array(new_df[columns].to_numpy(dtype=np.float64), columns, scalers)
+
+        pd.testing.assert_frame_equal(processed_df, expected_df, check_dtype=False, rtol=1e-9)
+        np.testing.assert_allclose(X, expected_df[columns].to_numpy(dtype=np.float64), rtol=1e-9)
+
+
+class TestLegacyScalers:
+    """Scaler files written as {feature: sklearn scaler} must keep working"""
+
+    def test_conversion_matches_sklearn_transform(self, train_df, new_df):
+        """Converted offsets and scales give sklearn's transform"""
+        _, sklearn_scalers = sklearn_fit(train_df)
+        expected = sklearn_transform(new_df, sklearn_scalers)
+
+        scalers = _scalers_from_sklearn(sklearn_scalers)
+        X = scale_array(new_df[scalers['columns']].to_numpy(dtype=np.float64),
+                        scalers['columns'], scalers)
+
+        np.testing.assert_allclose(X, expected[scalers['columns']].to_numpy(dtype=np.float64),
+                                   rtol=1e-9)
+
+    def test_legacy_file_loads(self, train_df, new_df, tmp_path):
+        """A legacy file loads through load_scalers and transforms like sklearn"""
+        _, sklearn_scalers = sklearn_fit(train_df)
+        scaler_path = str(tmp_path / 'scaler.pkl')
+        joblib.dump(sklearn_scalers, scaler_path)
+
+        processed_df = preprocess_with_scalers(new_df, scaler_path)
+
+        assert load_scalers(scaler_path)['columns'] == list(sklearn_scalers)
+        pd.testing.assert_frame_equal(processed_df, sklearn_transform(new_df, sklearn_scalers),
+                                      check_dtype=False, rtol=1e-9)
+
+    def test_unsupported_scaler_is_rejected(self):
+        """Anything other than Standard/MinMax scalers raises ValueError"""
+        with pytest.raises(ValueError, match='Unsupported scaler'):
+            _scalers_from_sklearn({'age': object()})
+
+
+class TestLoadScalersCache:
+    """load_scalers reuses the loaded file until it changes on disk"""
+
+    def test_reuses_and_reloads_on_change(self, train_df, tmp_path):
+        """Unchanged files come from the cache; a rewritten file is reloaded"""
+        scaler_path = str(tmp_path / 'scaler.pkl')
+        _, first = preprocess_and_fit(train_df, scaler_path=scaler_path)
+
+        loaded = load_scalers(scaler_path)
+        assert load_scalers(scaler_path) is loaded
+        np.testing.assert_array_equal(loaded['offset'], first['offset'])
+
+        _, second = preprocess_and_fit(make_frame(500, seed=2), scaler_path=scaler_path)
+        mtime = os.path.getmtime(scaler_path)
+        os.utime(scaler_path, (mtime + 10, mtime + 10))  # a distinct mtime on coarse clocks
+
+        reloaded = load_scalers(scaler_path)
+        assert reloaded is not loaded
+        np.testing.assert_array_equal(reloaded['offset'], second['offset'])
+
+    def test_missing_file(self, tmp_path):
+        """A missing scaler file raises FileNotFoundError"""
+        with pytest.raises(FileNotFoundError, match='Scaler file not found'):
+            load_scalers(str(tmp_path / 'missing.pkl'))
@@ -0,0 +1,142 @@
+"""
+Tests for the retraining scheduler's new-label trigger and its saved state.
+"""
+
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app import db
+from app.models import Customer, CustomerLabel
+from app.services import scheduler_service
+from app.services.scheduler_service import IntegratedRetrainingScheduler
+
+OLD = datetime(2026, 1, 1)
+LAST_TRAINING = datetime(2026, 2, 1)
+NEW = datetime(2026, 3, 1)
+
+
+def add_labels(ids, updated_at):
+    db.session.add_all(Customer(id=customer_id) for customer_id in ids)
+    db.session.flush()
+    db.session.add_all(
+        CustomerLabel(id=customer_id, target=customer_id % 2 == 0,
+                      created_at=updated_at, updated_at=updated_at)
+        for customer_id in ids)
+    db.session.commit()
+
+
+@pytest.fixture
+def retrain_calls(monkeypatch, tmp_path):
+    """Replace retrain_model with a stub recording the data it is given."""
+    calls = []
+
+    def fake_retrain_model(new_data, **kwargs):
+        calls.append(new_data)
+        model_path = str(tmp_path / 'model.keras')
+        open(model_path, 'w').close()
+        return {
+            'model': object(),
+            'model_path': model_path,
+            'scaler_path': str(tmp_path / 'scaler.pkl'),
+            'final_metrics': {'loss': 0.1}
+        }
+
+    monkeypatch.setattr(scheduler_service, 'retrain_model', fake_retrain_model)
+    return calls
+
+
+@pytest.fixture
+def models_dir(monkeypatch, tmp_path):
+    """Point the scheduler's state file and MODEL_PATH at a temp dir."""
+    monkeypatch.setattr(scheduler_service, 'ML_MODELS_DIR', str(tmp_path))
+    monkeypatch.setattr(scheduler_service, 'MODEL_PATH', str(tmp_path / 'missing.keras'))
+    return tmp_path
+
+
+@pytest.fixture
+def scheduler(app, models_dir):
+    scheduler = IntegratedRetrainingScheduler()
+    scheduler.app = app
+    scheduler.min_new_labels = 3
+    return scheduler
+
+
+class TestNewLabelTrigger:
+    """Tests for skipping runs below RETRAIN_MIN_NEW_LABELS"""
+
+    def test_skips_below_min_new_labels(self, scheduler, retrain_calls, models_dir):
+        """Fewer new labels than the minimum: no training, no saved state"""
+        add_labels([1, 2, 3, 4], OLD)
+        add_labels([5, 6], NEW)
+        scheduler.last_training_time = LAST_TRAINING
+
+        scheduler.retrain_job()
+
+        assert retrain_calls == []
+        assert scheduler.training_count == 0
+        assert scheduler.last_training_time == LAST_TRAINING
+        assert not os.path.exists(models_dir / 'scheduler_state.json')
+
+    def test_runs_at_min_new_labels(self, scheduler, retrain_calls):
+        """Reaching the minimum trains on the labels changed since the last run"""
+        add_labels([1, 2, 3, 4], OLD)
+        add_labels([5, 6, 7], NEW)
+        scheduler.last_training_time = LAST_TRAINING
+
+        scheduler.retrain_job()
+
+        assert len(retrain_calls) == 1
+        assert sorted(retrain_calls[0]['id']) == [5, 6, 7]
+        assert scheduler.training_count == 1
+        assert scheduler.last_training_time > LAST_TRAINING
+
+    def test_first_training_ignores_minimum(self, scheduler, retrain_calls):
+        """With no previous run, all labels are used however few there are"""
+        add_labels([1, 2], OLD)
+
+        scheduler.retrain_job()
+
+        assert len(retrain_calls) == 1
+        assert isinstance(retrain_calls[0], pd.DataFrame)
+        assert sorted(retrain_calls[0]['id']) == [1, 2]
+
+
+class TestSchedulerState:
+    """Tests for the training state kept across restarts"""
+
+    def test_state_survives_restart(self, scheduler, retrain_calls, models_dir):
+        """A new scheduler resumes the count and time, and skips what is already trained"""
+        add_labels([1, 2, 3], OLD)
+        scheduler.retrain_job()
+
+        restarted = IntegratedRetrainingScheduler()
+        restarted.app = scheduler.app
+        restarted.min_new_labels = 3
+
+        assert restarted.state_restored
+        assert restarted.training_count == 1
+        assert restarted.last_training_time == scheduler.last_training_time
+
+        restarted.retrain_job()
+        assert len(retrain_calls) == 1
+        assert restarted.training_count == 1
+
+    def test_no_state_file(self, models_dir):
+        """Without a saved state the scheduler starts fresh"""
+        scheduler = IntegratedRetrainingScheduler()
+
+        assert not scheduler.state_restored
+        assert scheduler.training_count == 0
+        assert scheduler.last_training_time is None
+
+    def test_unreadable_state_file(self, models_dir):
+        """A corrupt state file is ignored rather than failing startup"""
+        (models_dir / 'scheduler_state.json').write_text('{not json')
+
+        scheduler = IntegratedRetrainingScheduler()
+
+        assert not scheduler.state_restored
+        assert scheduler.training_count == 0